@@ -2,20 +2,22 @@ import os
 import json
 import time
 import threading
-from flask import Flask, render_template, request, redirect, url_for, Response, flash
+from flask import Flask, render_template, request, redirect, url_for, Response, flash, jsonify
 from werkzeug.utils import secure_filename
 
 # Import all validation functions and logger
 from main import (
     validate_schema,
     validate_data,
-    validate_table_names,
-    validate_column_names,
-    validate_column_types,
-    validate_foreign_keys,
-    validate_properties,
+    run_validation,
+    VALIDATION_PHASES,
     SchemaValidatorLogger
 )
+from utils.checkpoint import ValidationCheckpoint
+from utils.engine import ENGINES, plan_engine, load_data
+from utils.file_loader import exceeds_size, is_zip_archive, load_json_file
+from utils.key_index import KeyIndexRegistry
+from utils.report import ValidationReport, DEFAULT_PAGE_SIZE
 
 app = Flask(__name__)
 app.secret_key = "SOME_SUPER_DUPER_TELL_NO_ONE_SECRET_KEY_GO_BUCKEYES"
@@ -25,8 +27,15 @@ UPLOAD_FOLDER = 'uploads'
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 
+# How uploaded data files are loaded, 'auto' picks the engine per file
+app.config['ENGINE'] = 'auto'
+
+# Largest (decompressed) upload accepted, a small compressed file can unpack to far more
+app.config['MAX_DECOMPRESSED_SIZE'] = 512 * 1024 * 1024
+
 # Global references for SSE
 logger = None  
+validation_report = None
 validation_progress = {
     'steps_completed': 0,
     'total_steps': 0,
@@ -54,6 +63,12 @@ def upload_files():
         flash('Please upload both schema.json and data.json files.', 'danger')
         return redirect(url_for('index'))
 
+    # Compressed uploads (.json.gz, .json.bz2, .json.xz) are stored as-is and
+    # decompressed while they are parsed; ZIP archives can't be streamed that way
+    if is_zip_archive(schema_file.stream) or is_zip_archive(data_file.stream):
+        flash('ZIP archives are not supported. Please upload .json, .json.gz, .json.bz2 or .json.xz files.', 'danger')
+        return redirect(url_for('index'))
+
     schema_filename = secure_filename(schema_file.filename)
     data_filename = secure_filename(data_file.filename)
 
@@ -63,6 +78,14 @@ def upload_files():
     schema_file.save(schema_path)
     data_file.save(data_path)
 
+    max_size = app.config['MAX_DECOMPRESSED_SIZE']
+    if exceeds_size(schema_path, max_size) or exceeds_size(data_path, max_size):
+        os.remove(schema_path)
+        if os.path.exists(data_path):
+            os.remove(data_path)
+        flash(f'Uploaded files may be at most {max_size // (1024 * 1024)} MiB (decompressed).', 'danger')
+        return redirect(url_for('index'))
+
     return redirect(url_for('validate', schema_filename=schema_filename, data_filename=data_filename))
 
 @app.route('/validate/<schema_filename>/<data_filename>')
@@ -101,9 +124,13 @@ def run_validation_process(schema_path, data_path):
     global logger
     logger = SchemaValidatorLogger()
 
+    global validation_report
+    validation_report = None
+
     global validation_progress
     validation_progress['status'] = 'running'
     validation_progress['steps_completed'] = 0
+    validation_progress['logger_messages'] = None
 
     steps = [
         'Loading Schema & Data',
@@ -112,8 +139,7 @@ def run_validation_process(schema_path, data_path):
         'Checking Table Names',
         'Checking Column Names',
         'Checking Foreign Keys',
-        'Checking Column Types',
-        'Checking Properties',
+        'Checking Column Types & Properties',
         'Finishing Validation'
     ]
     validation_progress['total_steps'] = len(steps)
@@ -122,10 +148,16 @@ def run_validation_process(schema_path, data_path):
     validation_progress['current_step'] = steps[0]
     update_progress()
     try:
-        with open(schema_path, 'r') as f:
-            schema = json.load(f)
-        with open(data_path, 'r') as f:
-            data = json.load(f)
+        schema = load_json_file(schema_path)
+        engine = app.config['ENGINE']
+        fk_backend = 'hash'
+        if engine == 'auto':
+            plan = plan_engine(schema, data_path)
+            for line in plan.describe():
+                app.logger.info(f"Engine plan: {line}")
+            engine = plan.engine
+            fk_backend = plan.fk_backend
+        data = load_data(data_path, engine)
     except Exception as e:
         logger.add_message(f"Error reading files: {e}", 'error')
         validation_progress['status'] = 'finished'
@@ -160,43 +192,24 @@ def run_validation_process(schema_path, data_path):
     time.sleep(0.7)
     increment_step()
 
-    # Step 4: Check table names
-    validation_progress['current_step'] = steps[3]
-    update_progress()
-    validate_table_names(data, schema, logger)
-    time.sleep(0.7)
-    increment_step()
-
-    # Step 5: Check column names
-    validation_progress['current_step'] = steps[4]
-    update_progress()
-    validate_column_names(data, schema, logger)
-    time.sleep(0.7)
-    increment_step()
-
-    # Step 6: Check foreign keys
-    validation_progress['current_step'] = steps[5]
-    update_progress()
-    validate_foreign_keys(data, schema, logger)
-    time.sleep(0.7)
-    increment_step()
+    # Steps 4-7: Table names, column names, foreign keys, column types & properties.
+    # Progress is checkpointed, so a run killed by a restart resumes where it stopped
+    first_check_step = 3
 
-    # Step 7: Check column types
-    validation_progress['current_step'] = steps[6]
-    update_progress()
-    validate_column_types(data, schema, logger)
-    time.sleep(0.7)
-    increment_step()
+    def on_phase(phase_index, phase):
+        if phase_index > 0:
+            time.sleep(0.7)
+            increment_step()
+        validation_progress['current_step'] = steps[first_check_step + phase_index]
+        update_progress()
 
-    # Step 8: Check properties
-    validation_progress['current_step'] = steps[7]
-    update_progress()
-    validate_properties(data, schema, logger)
+    checkpoint = ValidationCheckpoint.for_files(schema_path, data_path)
+    run_validation(data, schema, logger, checkpoint, on_phase, KeyIndexRegistry(backend=fk_backend))
     time.sleep(0.7)
     increment_step()
 
-    # Step 9: Finishing
-    validation_progress['current_step'] = steps[8]
+    # Step 8: Finishing
+    validation_progress['current_step'] = steps[first_check_step + len(VALIDATION_PHASES)]
     update_progress()
     time.sleep(0.5)
 
@@ -223,29 +236,40 @@ def update_progress():
 
 def finalize_sse_data():
     """
-    Adds logger messages to validation_progress with styled formatting.
-    Groups identical messages and adds their count.
+    Builds the server-side report of grouped messages and publishes only
+    the number of distinct messages per severity through SSE. The messages
+    themselves are fetched page by page from /results.
     """
     global validation_progress
+    global validation_report
     global logger
-    
-    def combine_messages(messages, style):
-        message_counts = {}
-        for msg in messages:
-            message_counts[msg] = message_counts.get(msg, 0) + 1
-        
-        # Add HTML styling to messages with count first
-        return [f"<span class='{style}'>"
-                f"<span class='message-count'>{f'({count}x)'} </span>"
-                f"<span class='message-text'>{msg}</span></span>" 
-                for msg, count in message_counts.items()]
-
-    validation_progress['logger_messages'] = {
-        'info': combine_messages(logger.info, 'info-message'),
-        'warnings': combine_messages(logger.warnings, 'warning-message'),
-        'errors': combine_messages(logger.errors, 'error-message'),
-        'structural_errors': combine_messages(logger.structural_errors, 'structural-error-message')
-    }
+
+    validation_report = ValidationReport(logger)
+    validation_progress['logger_messages'] = validation_report.summary()
+
+@app.route('/results')
+def results():
+    """
+    Returns a page of grouped messages of one severity as JSON, optionally
+    filtered by table, column or message text.
+    """
+    if validation_report is None:
+        return jsonify({'error': 'No validation results available'}), 404
+
+    try:
+        report_page = validation_report.page(
+            request.args.get('severity', 'errors'),
+            page=request.args.get('page', 1, type=int),
+            per_page=request.args.get('per_page', DEFAULT_PAGE_SIZE, type=int),
+            table=request.args.get('table') or None,
+            column=request.args.get('column') or None,
+            text=request.args.get('q') or None
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    report_page['tables'] = validation_report.tables()
+    return jsonify(report_page)
 
 def stream_with_context_sse():
     """
@@ -267,4 +291,12 @@ def stream_with_context_sse():
         time.sleep(1)
 
 if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Run the Valigator web interface.')
+    parser.add_argument('--engine', type=str, choices=('auto',) + ENGINES, default='auto',
+                        help='How to load uploaded data files, chosen per file by default')
+    args = parser.parse_args()
+    app.config['ENGINE'] = args.engine
+
     app.run(debug=True)
@@ -1,14 +1,22 @@
 # main.py
 
 import argparse
-import json
+import logging
+import os
 import datetime
 import re
+from collections.abc import Mapping
 
 from validators.type_validators import column_type_validator
-from validators.property_validators import regex_validator, nullable_validator, no_less_than_validator, no_greater_than_validator
+from validators.property_validators import regex_validator, nullable_validator, no_less_than_validator, no_greater_than_validator, unique_validator
+from validators.check_planner import ColumnPlan
 
-from utils.logger import SchemaValidatorLogger
+from utils.logger import DIAGNOSTICS_LOGGER, SchemaValidatorLogger, enable_diagnostics
+from utils.file_loader import load_json_file
+from utils.checkpoint import ValidationCheckpoint, DEFAULT_CHECKPOINT_DIR
+from utils.schema_diff import diff_schemas, diff_references, prune_schema, save_validation_state, load_validation_state
+from utils.value_cache import ColumnValueCaches, cached_findings
+from utils.key_index import KeyIndexRegistry, BLOOM_BITS_PER_KEY
 
 def validate_schema(schema, logger):
     """Validate schema structure"""
@@ -82,19 +90,19 @@ def validate_data(data, logger):
     """Validate data structure"""
     has_errors = False
     
-    if not isinstance(data, dict):
+    if not isinstance(data, Mapping):
         logger.add_message("Data must be a dictionary", 'structural_error')
         raise ValueError("Data must be a dictionary")
         
     for class_name, objects in data.items():
         if not isinstance(objects, list):
-            logger.add_message(f"The value for class '{class_name}' should be a list of objects", 'structural_error')
+            logger.add_message(f"The value for class '{class_name}' should be a list of objects", 'structural_error', table=class_name)
             has_errors = True
             continue  # Skip object validation if the class value isn't a list
 
         for obj in objects:
             if not isinstance(obj, dict):
-                logger.add_message(f"Each object in class '{class_name}' should be a dictionary", 'structural_error')
+                logger.add_message(f"Each object in class '{class_name}' should be a dictionary", 'structural_error', table=class_name)
                 has_errors = True
                 
                 
@@ -108,13 +116,13 @@ def validate_table_names(data, schema, logger):
     # Check for classes that are not in the schema
     for obj_class in data:
         if obj_class not in schema_table_names:
-            logger.add_message(f"The Class '{obj_class}' is not found in schema", 'warning')
+            logger.add_message(f"The Class '{obj_class}' is not found in schema", 'warning', table=obj_class)
             
             
     # Check for classes that are in the schema but not in the data
     for schema_table in schema['tables']:
         if schema_table['name'] not in data:
-            logger.add_message(f"The Class '{schema_table['name']}' is not found in data", 'info')
+            logger.add_message(f"The Class '{schema_table['name']}' is not found in data", 'info', table=schema_table['name'])
             
 
    
@@ -152,48 +160,91 @@ def validate_column_names(data, schema, logger):
 
         # Get the columns of the table from the schema
         expected_columns = [column['name'] for column in schema_table['columns']]
+        expected_column_set = set(expected_columns)
+
+        # Rows of a table nearly always share the same keys, so the findings are
+        # computed once per distinct shape (ordered key tuple) and replayed per row
+        shape_findings = {}
 
         # Iterate over the objects in the data
         for obj in data[obj_class]:
-            # Check if there are columns in the data that are not in the schema
-            for attribute, value in obj.items():
-                if attribute not in expected_columns:
-                    logger.add_message(f'The attribute {obj_class}.{attribute} is not a valid column in the schema', 'warning')
-
-            # Check if there are columns in the schema that are not in the data (these will just be info)
-            for column in expected_columns:
-                if column not in obj:
-                    logger.add_message(f"{obj_class}.{column} not found in data", 'info')
-
-def validate_column_types(data, schema, logger):
+            shape = tuple(obj)
+            findings = shape_findings.get(shape)
+            if findings is None:
+                findings = []
+                # Check if there are columns in the data that are not in the schema
+                for attribute in shape:
+                    if attribute not in expected_column_set:
+                        findings.append((f'The attribute {obj_class}.{attribute} is not a valid column in the schema', 'warning', attribute))
+
+                # Check if there are columns in the schema that are not in the data (these will just be info)
+                for column in expected_columns:
+                    if column not in obj:
+                        findings.append((f"{obj_class}.{column} not found in data", 'info', column))
+                shape_findings[shape] = findings
+
+            for message, message_type, column in findings:
+                logger.add_message(message, message_type, table=obj_class, column=column)
+
+def validate_column_types(data, schema, logger, value_caches=None):
     """Validate column types in data against schema"""
+    report_caches = value_caches is None
+    if value_caches is None:
+        value_caches = ColumnValueCaches()
+
     for obj_class in data:
         # Only check if the table is in the schema
         if obj_class in [schema_table['name'] for schema_table in schema['tables']]:
             # Get the corresponding schema table
             corresponding_schema_table = next(schema_table for schema_table in schema['tables'] if schema_table['name'] == obj_class)
 
+            # Map each column name to its definition (the first one wins, like a linear search would)
+            schema_columns = {}
+            for schema_column in corresponding_schema_table['columns']:
+                schema_columns.setdefault(schema_column['name'], schema_column)
+
             # Iterate over the objects of this Class type
             for obj in data[obj_class]:
                 # Iterate over each of the attributes for the given object and their values
                 for attribute, value in obj.items():
                     # Only check the attribute if found in the schema and value is not None
-                    if attribute in [column['name'] for column in corresponding_schema_table['columns']] and value is not None:
-                        # Get the corresponding attribute/column definition from the Schema
-                        corresponding_schema_column = next(schema_column for schema_column in corresponding_schema_table['columns'] if schema_column['name'] == attribute)
+                    if attribute in schema_columns and value is not None:
                         # Get the expected column/attribute type from the schema
-                        column_type_uuid = corresponding_schema_column['type']
+                        column_type_uuid = schema_columns[attribute]['type']
                         column_type_name = next(column['name'] for column in schema['column_types'] if column['uuid'] == column_type_uuid)
 
-                        # Use the validator function
-                        column_type_validator(attribute, value, column_type_name, logger)
+                        # Use the validator function, reusing the findings of values seen before in this column
+                        cache = value_caches.get('type', obj_class, attribute)
+                        findings = cached_findings(
+                            cache, value,
+                            lambda recorder: column_type_validator(attribute, value, column_type_name, recorder)
+                        )
+                        for message, message_type in findings:
+                            logger.add_message(message, message_type, table=obj_class, column=attribute)
+
+    if report_caches:
+        value_caches.report()
+
+def validate_foreign_keys(data, schema, logger, tables=None, added_warnings=None, key_indexes=None):
+    """Validate foreign key relationships in data against schema.
+
+    tables optionally restricts the objects that are checked (e.g. to a slice of
+    rows) while related objects are still looked up in data, and added_warnings
+    carries the already reported warnings across calls. Related values are looked
+    up in the KeyIndexRegistry key_indexes, which also resolves related tables
+    that are not in data from registered reference datasets.
+    """
+    if tables is None:
+        tables = data
+
+    if key_indexes is None:
+        key_indexes = KeyIndexRegistry()
 
-def validate_foreign_keys(data, schema, logger):
-    """Validate foreign key relationships in data against schema"""
     # Track which warnings we've already added to avoid duplicates
-    added_warnings = set()
+    if added_warnings is None:
+        added_warnings = set()
 
-    for obj_class in data:
+    for obj_class in tables:
         # Only check if the table is in the schema
         if obj_class not in [schema_table['name'] for schema_table in schema['tables']]:
             continue
@@ -202,7 +253,7 @@ def validate_foreign_keys(data, schema, logger):
         corresponding_schema_table = [schema_table for schema_table in schema['tables'] if schema_table['name'] == obj_class][0]
 
         # Iterate over the objects in the data
-        for obj in data[obj_class]:
+        for obj in tables[obj_class]:
             # Only verify the attributes that are in the schema
             for attribute, value in obj.items():
                 # Skip if value is None (NULL)
@@ -226,12 +277,18 @@ def validate_foreign_keys(data, schema, logger):
                         related_table_name = [schema_table['name'] for schema_table in schema['tables'] if schema_table['uuid'] == related_table_uuid][0]
                         related_column_name = [column['name'] for schema_table in schema['tables'] if schema_table['uuid'] == related_table_uuid for column in schema_table['columns'] if column['uuid'] == related_column_uuid][0]
 
-                        # Check to see that the related table exists
-                        warning_msg = f"Related table '{related_table_name}' not found in data for foreign key '{attribute}' in table '{obj_class}'"
-                        if related_table_name not in data and warning_msg not in added_warnings:
-                            logger.add_message(warning_msg, 'warning')
-                            added_warnings.add(warning_msg)
+                        # Check to see that the related table exists, in the data or in a reference dataset
+                        related_keys = key_indexes.get(data, related_table_name, related_column_name)
+                        if related_keys is None:
+                            warning_msg = f"Related table '{related_table_name}' not found in data for foreign key '{attribute}' in table '{obj_class}'"
+                            if warning_msg not in added_warnings:
+                                logger.add_message(warning_msg, 'warning', table=obj_class, column=attribute)
+                                added_warnings.add(warning_msg)
                             continue
+                        if key_indexes.is_external(data, related_table_name, related_column_name):
+                            source = 'the reference data'
+                        else:
+                            source = 'the data'
 
                         # Handle both single values and arrays
                         values_to_check = value if isinstance(value, list) else [value]
@@ -241,44 +298,73 @@ def validate_foreign_keys(data, schema, logger):
                             # Skip if value is None
                             if single_value is None:
                                 continue
-                                
-                            related_object_found = False
-                            
-                            # Iterate over the related objects
-                            if related_table_name in data:
-                                for related_obj in data[related_table_name]:
-                                    # Check to see that the related column exists
-                                    if related_column_name not in related_obj:
-                                        continue
-                                    
-                                    # Check to see that the related column value exists in the related table
-                                    if single_value == related_obj[related_column_name]:
-                                        related_object_found = True
-                                        break
-
-                                if not related_object_found:
-                                    warning_msg = f"The object {obj_class}.{attribute} with value {single_value} is not related to any {related_table_name}.{related_column_name} in the data"
-                                    if warning_msg not in added_warnings:
-                                        logger.add_message(warning_msg, 'warning')
-                                        added_warnings.add(warning_msg)
-
-
-def validate_properties(data, schema, logger):
+
+                            # Check to see that the value exists in the related column
+                            if single_value not in related_keys:
+                                warning_msg = f"The object {obj_class}.{attribute} with value {single_value} is not related to any {related_table_name}.{related_column_name} in {source}"
+                                if warning_msg not in added_warnings:
+                                    logger.add_message(warning_msg, 'warning', table=obj_class, column=attribute)
+                                    added_warnings.add(warning_msg)
+
+
+def validate_unique_properties(data, schema, logger, key_indexes=None, tables=None):
+    """Validate the unique-prop property of columns in data against schema.
+
+    Each unique column is checked in one pass with the column's hash index from
+    key_indexes, the same index foreign key lookups into the column use. Every
+    duplicated value is reported once with its number of occurrences and a sample
+    of its row positions. tables optionally restricts the tables that are checked.
+    """
+    if tables is None:
+        tables = data
+
+    if key_indexes is None:
+        key_indexes = KeyIndexRegistry()
+
+    for obj_class in tables:
+        if obj_class not in [schema_table['name'] for schema_table in schema['tables']]:
+            continue
+
+        corresponding_schema_table = [schema_table for schema_table in schema['tables'] if schema_table['name'] == obj_class][0]
+
+        for schema_column in corresponding_schema_table['columns']:
+            for property in schema_column['properties'] or []:
+                if property['type'] != 'unique-prop':
+                    continue
+                attribute = schema_column['name']
+                index = key_indexes.get(data, obj_class, attribute, duplicates=True)
+                for value, count, positions in index.duplicate_values():
+                    if unique_validator(count, property['value']):
+                        continue
+                    rows = ', '.join(str(position) for position in positions)
+                    if count > len(positions):
+                        rows += f" and {count - len(positions)} more"
+                    logger.add_message(
+                        f"Validation failed for {attribute} with value {value} against property unique: "
+                        f"{count} occurrences in {obj_class} at rows {rows}",
+                        'error', table=obj_class, column=attribute
+                    )
+
+def validate_properties(data, schema, logger, value_caches=None, key_indexes=None):
     """Validate properties for all columns in the data against schema"""
-    from validators.property_validators import (
-        regex_validator, 
-        nullable_validator,
-        no_less_than_validator,
-        no_greater_than_validator
-    )
-
-    # Map property types to their validators and clean names
-    property_validators = {
-        'regex-prop': ('regex', regex_validator),
-        'nullable-prop': ('nullable', nullable_validator),
-        'no-less-than-prop': ('NoLessThan', no_less_than_validator),
-        'no-greater-than-prop': ('NoGreaterThan', no_greater_than_validator)
-    }
+    from validators.property_validators import PROPERTY_VALIDATORS, property_failure_message
+
+    def check_properties(attribute, value, properties, logger):
+        for property in properties:
+            property_type = property['type']
+            property_value = property['value']
+
+            if property_type in PROPERTY_VALIDATORS:
+                _, validator = PROPERTY_VALIDATORS[property_type]
+                if not validator(value, property_value):
+                    logger.add_message(property_failure_message(attribute, value, property_type, property_value), 'error')
+
+    report_caches = value_caches is None
+    if value_caches is None:
+        value_caches = ColumnValueCaches()
+
+    if key_indexes is None:
+        key_indexes = KeyIndexRegistry()
 
     for obj_class in data:
         if obj_class not in [schema_table['name'] for schema_table in schema['tables']]:
@@ -286,56 +372,390 @@ def validate_properties(data, schema, logger):
 
         corresponding_schema_table = [schema_table for schema_table in schema['tables'] if schema_table['name'] == obj_class][0]
 
+        # Map each column name to its definition (the first one wins, like a linear search would)
+        schema_columns = {}
+        for schema_column in corresponding_schema_table['columns']:
+            schema_columns.setdefault(schema_column['name'], schema_column)
+
         for obj in data[obj_class]:
             for attribute, value in obj.items():
-                schema_column = next((col for col in corresponding_schema_table['columns'] if col['name'] == attribute), None)
+                schema_column = schema_columns.get(attribute)
                 if not schema_column or not schema_column['properties']:
                     continue
 
-                for property in schema_column['properties']:
-                    property_type = property['type']
-                    property_value = property['value']
-
-                    if property_type in property_validators:
-                        clean_name, validator = property_validators[property_type]
-                        if not validator(value, property_value):
-                            # Special case for regex to avoid complex pattern in error message
-                            if property_type == 'regex-prop':
-                                logger.add_message(
-                                    f"Validation failed for {attribute} with value {value} against property {clean_name}",
-                                    'error'
-                                )
-                            else:
-                                logger.add_message(
-                                    f"Validation failed for {attribute} with value {value} against property {clean_name} with condition {str(property_value).lower()}",
-                                    'error'
-                                )
+                # Reuse the findings of values seen before in this column
+                cache = value_caches.get('properties', obj_class, attribute)
+                findings = cached_findings(
+                    cache, value,
+                    lambda recorder: check_properties(attribute, value, schema_column['properties'], recorder)
+                )
+                for message, message_type in findings:
+                    logger.add_message(message, message_type, table=obj_class, column=attribute)
+
+        # Uniqueness is a property of the whole column rather than of single values
+        validate_unique_properties(data, schema, logger, key_indexes, [obj_class])
+
+    if report_caches:
+        value_caches.report()
+
+def validate_column_values(data, schema, logger, value_caches=None, column_plans=None):
+    """Validate column types and properties in a single pass with planned check order.
+
+    Each column gets a ColumnPlan that runs the checks whose failure can imply
+    others first, and reports checks whose failure is implied by an earlier
+    failure as skipped (info) instead of running them. Pass column_plans to keep
+    the plans across calls.
+    """
+    report_caches = value_caches is None
+    if value_caches is None:
+        value_caches = ColumnValueCaches()
+
+    if column_plans is None:
+        column_plans = {}
+
+    column_type_names = {column_type['uuid']: column_type['name'] for column_type in schema['column_types']}
+
+    for obj_class in data:
+        if obj_class not in [schema_table['name'] for schema_table in schema['tables']]:
+            continue
+
+        corresponding_schema_table = [schema_table for schema_table in schema['tables'] if schema_table['name'] == obj_class][0]
+
+        # Map each column name to its definition (the first one wins, like a linear search would)
+        schema_columns = {}
+        for schema_column in corresponding_schema_table['columns']:
+            schema_columns.setdefault(schema_column['name'], schema_column)
+
+        for obj in data[obj_class]:
+            for attribute, value in obj.items():
+                plan = column_plans.get((obj_class, attribute))
+                if plan is None:
+                    schema_column = schema_columns.get(attribute)
+                    if not schema_column:
+                        continue
+                    plan = ColumnPlan(attribute, column_type_names[schema_column['type']], schema_column['properties'])
+                    column_plans[(obj_class, attribute)] = plan
+
+                # Reuse the findings of values seen before in this column
+                cache = value_caches.get('values', obj_class, attribute)
+                findings = cached_findings(cache, value, lambda recorder: plan.evaluate(value, recorder))
+                for message, message_type in findings:
+                    logger.add_message(message, message_type, table=obj_class, column=attribute)
+
+    if report_caches:
+        value_caches.report()
+
+# Phases of run_validation, in the order they run
+VALIDATION_PHASES = ['table_names', 'column_names', 'foreign_keys', 'column_values']
+
+# Rows checked between two checkpoint opportunities
+CHECKPOINT_CHUNK_SIZE = 5000
+
+def run_validation(data, schema, logger, checkpoint=None, on_phase=None, key_indexes=None):
+    """Run the data checks that follow schema and data structure validation.
+
+    Row level phases run table by table in chunks of rows. With a checkpoint the
+    position reached is saved periodically and a saved position is resumed from,
+    producing the same findings as an uninterrupted run. on_phase is called with
+    the index and name of each phase as it starts. key_indexes provides the
+    foreign key target indexes, e.g. with reference datasets attached.
+    """
+    if key_indexes is None:
+        key_indexes = KeyIndexRegistry()
+
+    value_caches = ColumnValueCaches()
+    column_plans = {}
+    fk_warnings = set()
+
+    row_phases = {
+        # Column Names (Columns that aren't found in the Schema) (Warning)
+        'column_names': lambda tables: validate_column_names(tables, schema, logger),
+        # Foreign Key Checks (Warning)
+        'foreign_keys': lambda tables: validate_foreign_keys(data, schema, logger, tables, fk_warnings, key_indexes),
+        # Column Types (Warning if convertible like String to Float otherwise Error)
+        # and Property Checks, planned together per column
+        'column_values': lambda tables: validate_column_values(tables, schema, logger, value_caches, column_plans)
+    }
+
+    # Everything before this (phase, table, row offset) position is already done
+    resume_at = (0, 0, 0)
+    if checkpoint is not None:
+        state = checkpoint.load()
+        if state is not None:
+            checkpoint.restore_logger(state, logger)
+            fk_warnings.update(state['fk_warnings'])
+            resume_at = (state['phase'], state['table'], state['offset'])
+
+    for phase_index, phase in enumerate(VALIDATION_PHASES):
+        if on_phase is not None:
+            on_phase(phase_index, phase)
+        if phase_index < resume_at[0]:
+            continue
+        logger.phase = phase
+
+        if phase == 'table_names':
+            # Table Names
+            validate_table_names(data, schema, logger)
+        else:
+            for table_index, table in enumerate(data):
+                if (phase_index, table_index) < resume_at[:2]:
+                    continue
+                first_row = resume_at[2] if (phase_index, table_index) == resume_at[:2] else 0
+                rows = data[table]
+                for offset in range(first_row, len(rows), CHECKPOINT_CHUNK_SIZE):
+                    if phase == 'column_values' and offset == 0:
+                        # Uniqueness spans all rows of a table, so it is checked once per table
+                        validate_unique_properties(data, schema, logger, key_indexes, [table])
+                    row_phases[phase]({table: rows[offset:offset + CHECKPOINT_CHUNK_SIZE]})
+                    if checkpoint is not None:
+                        checkpoint.save(logger, phase_index, table_index, offset + CHECKPOINT_CHUNK_SIZE, fk_warnings)
+
+        if checkpoint is not None:
+            checkpoint.save(logger, phase_index + 1, 0, 0, fk_warnings)
+
+    logger.phase = None
+    if checkpoint is not None:
+        checkpoint.clear()
+    value_caches.report()
+
+def run_delta_validation(data, schema, logger, state, key_indexes=None, references=()):
+    """Re-run only the checks affected by the schema changes since a saved validation state.
+
+    Findings of the saved state whose checks are unaffected are carried over, the
+    affected checks are run against the new schema on the affected tables and
+    columns only. references are the content hashes of the reference datasets of
+    this run; if they differ from the saved ones every foreign key check is re-run.
+    Returns the SchemaDelta that was applied.
+    """
+    from utils.data_index import TableSelection
+
+    delta = diff_schemas(state['schema'], schema)
+    diff_references(state['references'], references, state['schema'], schema, delta)
+
+    # Carry over the findings of unaffected checks
+    for message_type, message, table, column, phase, count in state['findings']:
+        if not delta.affects(phase, table, column):
+            logger.phase = phase
+            for _ in range(count):
+                logger.add_message(message, message_type, table=table, column=column)
+
+    if delta.table_names:
+        logger.phase = 'table_names'
+        validate_table_names(data, schema, logger)
+
+    if delta.tables:
+        logger.phase = 'column_names'
+        validate_column_names(TableSelection(data, delta.tables), schema, logger)
+
+    if delta.foreign_keys:
+        logger.phase = 'foreign_keys'
+        affected_tables = TableSelection(data, {table for table, _ in delta.foreign_keys})
+        validate_foreign_keys(data, prune_schema(schema, delta, 'foreign_keys'), logger, affected_tables,
+                              key_indexes=key_indexes)
+
+    if delta.values:
+        logger.phase = 'column_values'
+        affected_tables = TableSelection(data, {table for table, _ in delta.values})
+        pruned_schema = prune_schema(schema, delta, 'column_values')
+        validate_unique_properties(data, pruned_schema, logger, key_indexes, affected_tables)
+        validate_column_values(affected_tables, pruned_schema, logger)
+
+    logger.phase = None
+    return delta
 
 # Start of the main script
 if __name__ == "__main__":
     import sys
 
     parser = argparse.ArgumentParser(description='Validate data against schema.')
-    parser.add_argument('schema_file', type=str, help='Path to the schema JSON file')
-    parser.add_argument('data_file', type=str, help='Path to the data JSON file')
+    parser.add_argument('schema_file', type=str, nargs='?', help='Path to the schema JSON file')
+    parser.add_argument('data_file', type=str, nargs='?', help='Path to the data JSON file')
+    parser.add_argument('--serve', action='store_true',
+                        help='Run as a resident validation daemon listening on --socket')
+    parser.add_argument('--socket', type=str, default=None,
+                        help='Unix socket of the validation daemon (client mode unless --serve is given)')
+    parser.add_argument('--resume', action='store_true',
+                        help='Resume from the last checkpoint of an interrupted run on the same files')
+    parser.add_argument('--checkpoint-dir', type=str, default=DEFAULT_CHECKPOINT_DIR,
+                        help='Directory for the periodic checkpoints of long validations')
+    parser.add_argument('--save-state', type=str, default=None,
+                        help='Save the findings and schema of this run for later delta revalidation')
+    parser.add_argument('--previous-state', type=str, default=None,
+                        help='Only re-run the checks affected by schema changes since this saved state')
+    parser.add_argument('--table', type=str, action='append', default=None,
+                        help='Only validate this table (repeatable); other tables are parsed only when referenced')
+    parser.add_argument('--reference', type=str, action='append', default=None,
+                        help='Resolve foreign keys into tables missing from the data against this reference dataset (repeatable)')
+    parser.add_argument('--register-reference', type=str, action='append', default=None,
+                        help='Index a reference dataset for the foreign keys of schema_file and exit (repeatable)')
+    parser.add_argument('--reference-dir', type=str, default=None,
+                        help='Directory of the persistent reference dataset key store (default: .valigator/references)')
+    parser.add_argument('--engine', type=str, choices=('auto', 'memory', 'indexed'), default='memory',
+                        help='How to load the data file: parsed whole in memory, table by table through its '
+                             'byte-offset index, or chosen automatically from the input size and available memory')
+    parser.add_argument('--plan', action='store_true',
+                        help='Print the engine plan --engine auto would choose and exit without validating')
+    parser.add_argument('--shard', type=str, action='append', default=None,
+                        help='Validate this shard of a dataset split across files (repeatable); foreign keys '
+                             'resolve across all shards and data_file, if given, is the first shard')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Worker processes validating shards in parallel (default: one per CPU)')
+    parser.add_argument('--bloom-filter', action='store_true',
+                        help='Prefilter foreign key lookups of sharded runs with Bloom filters, which pays off '
+                             'when many foreign keys are missing')
+    parser.add_argument('--verbose', action='store_true',
+                        help='Print the diagnostics of the run (engine plan, cache statistics, shard summaries) '
+                             'to stderr; --engine auto and --serve print them at a summary level')
     args = parser.parse_args()
 
+    # Diagnostics are kept out of the report unless asked for, or needed to follow an automatic choice
+    diagnostics = logging.getLogger(DIAGNOSTICS_LOGGER)
+    if args.verbose:
+        enable_diagnostics(logging.DEBUG)
+    elif args.engine == 'auto' or args.serve:
+        enable_diagnostics()
+
+    if args.serve:
+        from utils.daemon import serve, DEFAULT_SOCKET_PATH
+        serve(args.socket or DEFAULT_SOCKET_PATH)
+        sys.exit(0)
+
+    if args.register_reference:
+        if not args.schema_file:
+            parser.error('schema_file is required to register reference datasets')
+        from utils.reference_store import ReferenceStore, DEFAULT_REFERENCE_DIR, foreign_key_targets
+        logger = SchemaValidatorLogger()
+        reference_store = ReferenceStore(args.reference_dir or DEFAULT_REFERENCE_DIR)
+        try:
+            targets = foreign_key_targets(load_json_file(args.schema_file))
+            for reference_file in args.register_reference:
+                digest = reference_store.register(reference_file, targets)
+                logger.add_message(f"Registered reference dataset {reference_file} ({digest[:12]})", 'info')
+        except Exception as e:
+            logger.add_message(f"Error registering reference dataset: {e}", 'error')
+            sys.exit(1)
+        logger.print_messages()
+        sys.exit(0)
+
+    shard_files = ([args.data_file] if args.data_file else []) + (args.shard or [])
+    if not args.schema_file or not shard_files:
+        parser.error('schema_file and data_file are required unless --serve is given')
+    if args.shard and (args.socket or args.table or args.resume or args.save_state or args.previous_state):
+        parser.error('--shard cannot be combined with --socket, --table, --resume, --save-state or --previous-state')
+    if args.table and (args.save_state or args.previous_state):
+        # A state holds the findings of every table, a partial one would pass for complete
+        parser.error('--table cannot be combined with --save-state or --previous-state')
+    if args.socket:
+        # The daemon validates whole files in memory, these options would be silently ignored
+        client_unsupported = [flag for flag, value in [
+            ('--table', args.table),
+            ('--resume', args.resume),
+            ('--checkpoint-dir', args.checkpoint_dir != DEFAULT_CHECKPOINT_DIR),
+            ('--reference', args.reference),
+            ('--reference-dir', args.reference_dir),
+            ('--engine', args.engine != 'memory'),
+            ('--plan', args.plan),
+            ('--save-state', args.save_state),
+            ('--previous-state', args.previous_state),
+            ('--workers', args.workers),
+            ('--bloom-filter', args.bloom_filter),
+            ('--verbose', args.verbose)
+        ] if value]
+        if client_unsupported:
+            parser.error(f"{', '.join(client_unsupported)} cannot be combined with --socket")
+
     logger = SchemaValidatorLogger()
 
+    if args.socket:
+        from utils.daemon import request_validation
+        try:
+            response = request_validation(args.socket, args.schema_file, args.data_file)
+        except OSError as e:
+            logger.add_message(f"Error contacting validation daemon at {args.socket}: {e}", 'error')
+            logger.print_messages()
+            sys.exit(1)
+        logger.info = response['info']
+        logger.warnings = response['warnings']
+        logger.errors = response['errors']
+        logger.structural_errors = response['structural_errors']
+        # A failed run's report says why it failed
+        logger.print_messages()
+        sys.exit(0 if response['status'] == 'ok' else 1)
+
     try:
-        with open(args.schema_file, 'r') as f:
-            schema = json.load(f)
+        schema = load_json_file(args.schema_file)
     except Exception as e:
         logger.add_message(f"Error reading schema file: {e}", 'error')
         sys.exit(1)
 
+    engine = args.engine
+    fk_backend = 'hash'
+    workers = args.workers
+    if engine == 'auto' or args.plan:
+        from utils.engine import plan_engine
+        try:
+            # Shards are planned by the largest one
+            plan = plan_engine(schema, max(shard_files, key=os.path.getsize), shards=len(shard_files))
+        except Exception as e:
+            logger.add_message(f"Error planning the validation engine: {e}", 'error')
+            sys.exit(1)
+        if args.plan:
+            print('\n'.join(plan.describe()))
+            sys.exit(0)
+        for line in plan.describe():
+            diagnostics.info(f"Engine plan: {line}")
+        engine = plan.engine
+        fk_backend = plan.fk_backend
+        workers = args.workers or plan.workers
+
+    if args.shard:
+        from utils.engine import available_cpus
+        from utils.reference_store import DEFAULT_REFERENCE_DIR
+        from utils.sharding import validate_shards
+
+        try:
+            validate_schema(schema, logger)
+        except ValueError as e:
+            logger.add_message(f"Schema validation error: {e}", 'error')
+            sys.exit(1)
+
+        reports = validate_shards(schema, shard_files, workers or min(available_cpus(), len(shard_files)),
+                                  engine, fk_backend, args.reference or (), args.reference_dir or DEFAULT_REFERENCE_DIR,
+                                  BLOOM_BITS_PER_KEY if args.bloom_filter else 0)
+
+        # Report the findings of every shard, prefixed with the shard they were found in
+        failed = False
+        for shard_file, report in zip(shard_files, reports):
+            failed = failed or report['status'] != 'ok'
+            for severity in ['info', 'warnings', 'errors', 'structural_errors']:
+                getattr(logger, severity).extend(f"[{shard_file}] {message}" for message in report[severity])
+            diagnostics.info(
+                f"Shard {shard_file}: {len(report['warnings'])} warnings, {len(report['errors'])} errors"
+            )
+        logger.print_messages()
+        sys.exit(1 if failed else 0)
+
     try:
-        with open(args.data_file, 'r') as f:
-            data = json.load(f)
+        if args.table or engine == 'indexed':
+            # Parse the tables one at a time (with --table only the selected tables and
+            # the tables they reference) using the byte-offset index, unless the file
+            # can't be indexed
+            from utils.engine import load_data
+            data = load_data(args.data_file, 'indexed')
+        else:
+            data = load_json_file(args.data_file)
     except Exception as e:
         logger.add_message(f"Error reading data file: {e}", 'error')
         sys.exit(1)
 
+    if args.table:
+        from utils.data_index import TableSelection
+        for table in args.table:
+            if table not in data:
+                logger.add_message(f"The Class '{table}' is not found in data", 'error')
+                sys.exit(1)
+        data = TableSelection(data, args.table)
+
     # Validate schema and data formats
     try:
         validate_schema(schema, logger)
@@ -349,20 +769,39 @@ if __name__ == "__main__":
         logger.add_message(f"Data validation error: {e}", 'error')
         sys.exit(1)
 
-    # Table Names
-    validate_table_names(data, schema, logger)
-
-    # Column Names (Columns that aren't found in the Schema) (Warning)
-    validate_column_names(data, schema, logger)
-
-    # Column Types (Warning if convertible like String to Float otherwise Error)
-    validate_column_types(data, schema, logger)
-
-    # Foreign Key Checks (Warning)
-    validate_foreign_keys(data, schema, logger)
-
-    # Property Checks
-    validate_properties(data, schema, logger)
+    # Foreign keys into tables missing from the data resolve against the reference datasets
+    external_keys = {}
+    reference_digests = []
+    if args.reference:
+        from utils.reference_store import ReferenceStore, DEFAULT_REFERENCE_DIR, foreign_key_targets
+        reference_store = ReferenceStore(args.reference_dir or DEFAULT_REFERENCE_DIR)
+        try:
+            for reference_file in args.reference:
+                external_keys.update(reference_store.open(reference_file, foreign_key_targets(schema)))
+                reference_digests.append(reference_store.digest(reference_file))
+        except Exception as e:
+            logger.add_message(f"Error reading reference dataset: {e}", 'error')
+            sys.exit(1)
+    key_indexes = KeyIndexRegistry(external_keys, fk_backend)
+
+    if args.previous_state:
+        try:
+            state = load_validation_state(args.previous_state, args.data_file)
+        except (OSError, ValueError) as e:
+            logger.add_message(f"Error reading validation state: {e}", 'error')
+            sys.exit(1)
+        delta = run_delta_validation(data, schema, logger, state, key_indexes, reference_digests)
+        for change in delta.changes:
+            diagnostics.info(f"Schema delta: {change}")
+    else:
+        checkpoint = ValidationCheckpoint.for_files(args.schema_file, args.data_file, args.checkpoint_dir,
+                                                    scope=sorted(args.table) if args.table else None)
+        if not args.resume:
+            checkpoint.clear()
+        run_validation(data, schema, logger, checkpoint, key_indexes=key_indexes)
+
+    if args.save_state:
+        save_validation_state(args.save_state, schema, args.data_file, logger, reference_digests)
 
     # At the end, print or save the logger messages
     logger.print_messages()
@@ -0,0 +1,27 @@
+import copy
+
+
+# Two tables, Sensor.site_id references Site.id
+SITE_SENSOR_SCHEMA = {
+    'tables': [
+        {'uuid': 't-site', 'name': 'Site', 'columns': [
+            {'uuid': 'c-site-id', 'name': 'id', 'type': 'ct-int', 'relationship': None, 'properties': None}
+        ]},
+        {'uuid': 't-sensor', 'name': 'Sensor', 'columns': [
+            {'uuid': 'c-sensor-site', 'name': 'site_id', 'type': 'ct-int',
+             'relationship': [{'table_uuid': 't-site', 'column_uuid': 'c-site-id'}], 'properties': None}
+        ]}
+    ],
+    'column_types': [{'uuid': 'ct-int', 'name': 'INT'}]
+}
+
+
+def site_sensor_schema(site_id_properties=None, site_columns=(), sensor_columns=(), column_types=()):
+    """A copy of SITE_SENSOR_SCHEMA with properties on Site.id and extra columns and column types appended"""
+    schema = copy.deepcopy(SITE_SENSOR_SCHEMA)
+    site, sensor = schema['tables']
+    site['columns'][0]['properties'] = site_id_properties
+    site['columns'].extend(site_columns)
+    sensor['columns'].extend(sensor_columns)
+    schema['column_types'].extend(column_types)
+    return schema
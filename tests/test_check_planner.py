@@ -0,0 +1,40 @@
+import unittest
+
+from utils.value_cache import FindingRecorder
+from validators.check_planner import ColumnPlan
+
+
+class TestColumnPlan(unittest.TestCase):
+    def evaluate(self, plan, value):
+        recorder = FindingRecorder()
+        plan.evaluate(value, recorder)
+        return recorder.findings
+
+    def test_range_checks_are_skipped_after_failed_float_conversion(self):
+        plan = ColumnPlan('score', 'FLOAT', [
+            {'type': 'no-less-than-prop', 'value': 0},
+            {'type': 'regex-prop', 'value': '^a'}
+        ])
+        findings = self.evaluate(plan, 'abc')
+        self.assertEqual([message_type for _, message_type in findings], ['error', 'info'])
+        self.assertIn('cannot be converted', findings[0][0])
+        self.assertEqual(findings[1][0],
+                         'Skipped NoLessThan check for score with value abc: implied by the failed FLOAT type check')
+
+    def test_value_checks_are_skipped_after_failed_nullable(self):
+        plan = ColumnPlan('name', 'VARCHAR(255)', [
+            {'type': 'regex-prop', 'value': '^[A-Z]'},
+            {'type': 'nullable-prop', 'value': False}
+        ])
+        findings = self.evaluate(plan, None)
+        # Findings keep schema order even though the nullable check runs first
+        self.assertEqual(findings, [
+            ('Skipped regex check for name with value None: implied by the failed nullable check', 'info'),
+            ('Validation failed for name with value None against property nullable with condition false', 'error')
+        ])
+
+    def test_independent_failures_are_all_reported(self):
+        plan = ColumnPlan('age', 'INT', [{'type': 'no-greater-than-prop', 'value': 100}])
+        findings = self.evaluate(plan, '150.5')
+        # int('150.5') fails but the value is still numeric, so the range check runs
+        self.assertEqual([message_type for _, message_type in findings], ['error', 'error'])
@@ -0,0 +1,84 @@
+import tempfile
+import unittest
+from unittest import mock
+
+import main
+from main import SchemaValidatorLogger, run_validation
+from tests.fixtures import site_sensor_schema
+from utils.checkpoint import ValidationCheckpoint
+
+
+SCHEMA = site_sensor_schema(site_id_properties=[{'type': 'no-less-than-prop', 'value': 0}])
+
+DATA = {
+    'Site': [{'id': number - 5} for number in range(20)],
+    'Sensor': [{'site_id': number % 30, 'extra': 'x'} for number in range(40)]
+}
+
+
+class TestCheckpoint(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def checkpoint(self):
+        return ValidationCheckpoint(['schema', 'data'], self.tmp_dir.name, interval=0)
+
+    def test_resumed_run_matches_uninterrupted_run(self):
+        expected = SchemaValidatorLogger()
+        run_validation(DATA, SCHEMA, expected)
+
+        for interrupted_phase in ['validate_column_names', 'validate_foreign_keys', 'validate_column_values']:
+            with self.subTest(phase=interrupted_phase), mock.patch.object(main, 'CHECKPOINT_CHUNK_SIZE', 7):
+                original = getattr(main, interrupted_phase)
+                calls = []
+
+                def interrupt_after_some_chunks(*args, **kwargs):
+                    calls.append(1)
+                    if len(calls) == 4:
+                        raise KeyboardInterrupt
+                    return original(*args, **kwargs)
+
+                with mock.patch.object(main, interrupted_phase, interrupt_after_some_chunks):
+                    with self.assertRaises(KeyboardInterrupt):
+                        run_validation(DATA, SCHEMA, SchemaValidatorLogger(), self.checkpoint())
+                self.assertIsNotNone(self.checkpoint().load())
+
+                resumed = SchemaValidatorLogger()
+                run_validation(DATA, SCHEMA, resumed, self.checkpoint())
+                for severity in ['info', 'warnings', 'errors', 'structural_errors']:
+                    self.assertEqual(getattr(resumed, severity), getattr(expected, severity))
+                self.assertEqual(resumed.locations, expected.locations)
+
+                # A finished run leaves no checkpoint behind
+                self.assertIsNone(self.checkpoint().load())
+
+    def test_saves_only_append_new_messages(self):
+        checkpoint = self.checkpoint()
+        logger = SchemaValidatorLogger()
+        logger.add_message('Sensor.extra not found in schema', 'warning')
+        checkpoint.save(logger, 1, 0, 0, set(), force=True)
+        logger.add_message('Sensor.extra not found in schema', 'warning')
+        logger.add_message('Site.id is negative', 'error')
+        checkpoint.save(logger, 1, 0, 10, set(), force=True)
+
+        with open(checkpoint.journal_path, 'rb') as f:
+            self.assertEqual(len(f.read().splitlines()), 3)
+
+        # What an interrupted save appends after the checkpointed size is ignored
+        with open(checkpoint.journal_path, 'ab') as f:
+            f.write(b'["errors", "half a me')
+
+        resumed = self.checkpoint()
+        restored = SchemaValidatorLogger()
+        resumed.restore_logger(resumed.load(), restored)
+        self.assertEqual(restored.warnings, ['Sensor.extra not found in schema'] * 2)
+        self.assertEqual(restored.errors, ['Site.id is negative'])
+
+        restored.add_message('Site.id is negative', 'error')
+        resumed.save(restored, 2, 0, 0, set(), force=True)
+        with open(resumed.journal_path, 'rb') as f:
+            self.assertEqual(len(f.read().splitlines()), 4)
+
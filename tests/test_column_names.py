@@ -0,0 +1,71 @@
+import unittest
+
+from main import SchemaValidatorLogger, validate_column_names
+
+
+SCHEMA = {
+    'tables': [
+        {'name': 'Site', 'columns': [{'name': 'id'}, {'name': 'name'}, {'name': 'region'}]},
+        {'name': 'Sensor', 'columns': [{'name': 'id'}, {'name': 'site_id'}]}
+    ]
+}
+
+
+def unknown(table, column):
+    return f'The attribute {table}.{column} is not a valid column in the schema'
+
+
+def missing(table, column):
+    return f'{table}.{column} not found in data'
+
+
+class TestValidateColumnNames(unittest.TestCase):
+    def validate(self, data):
+        logger = SchemaValidatorLogger()
+        validate_column_names(data, SCHEMA, logger)
+        return logger
+
+    def test_rows_with_differing_key_sets(self):
+        logger = self.validate({'Site': [
+            {'id': 1, 'name': 'a', 'region': 'n'},
+            {'id': 2, 'extra': 1},
+            {'id': 3, 'name': 'b', 'region': 's'},
+            {'id': 4, 'extra': 2},
+            {}
+        ]})
+
+        self.assertEqual(logger.warnings, [unknown('Site', 'extra'), unknown('Site', 'extra')])
+        self.assertEqual(logger.info, [
+            missing('Site', 'name'), missing('Site', 'region'),
+            missing('Site', 'name'), missing('Site', 'region'),
+            missing('Site', 'id'), missing('Site', 'name'), missing('Site', 'region')
+        ])
+
+    def test_same_keys_in_a_different_order(self):
+        logger = self.validate({'Site': [
+            {'id': 1, 'color': 'red', 'extra': 0},
+            {'extra': 0, 'color': 'blue', 'id': 2},
+            {'id': 3, 'color': 'green', 'extra': 0}
+        ]})
+
+        # Unknown attributes are reported in the order of each row's keys
+        self.assertEqual(logger.warnings, [
+            unknown('Site', 'color'), unknown('Site', 'extra'),
+            unknown('Site', 'extra'), unknown('Site', 'color'),
+            unknown('Site', 'color'), unknown('Site', 'extra')
+        ])
+        self.assertEqual(logger.info, [missing('Site', 'name'), missing('Site', 'region')] * 3)
+
+    def test_unknown_and_missing_columns_in_the_same_table(self):
+        logger = self.validate({
+            'Sensor': [{'id': 1, 'site_id': 1}, {'site_id': 2, 'id': 2, 'unit': 'C'}, {'unit': 'F'}],
+            'Unknown': [{'x': 1}]
+        })
+
+        self.assertEqual(logger.warnings, [unknown('Sensor', 'unit'), unknown('Sensor', 'unit')])
+        self.assertEqual(logger.info, [missing('Sensor', 'id'), missing('Sensor', 'site_id')])
+        self.assertEqual(logger.errors, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
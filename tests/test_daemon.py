@@ -0,0 +1,60 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from utils.daemon import SchemaCache, validate_files
+
+
+MINIMAL_SCHEMA = {
+    'version': '1.0',
+    'release_date': '2024-03-20',
+    'commentary': '',
+    'tables': [],
+    'table_types': [],
+    'column_types': [],
+    'relationship_types': [],
+    'property_types': []
+}
+
+
+class TestValidationDaemon(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.tmp_path = Path(self.tmp_dir.name)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def write_json(self, name, content):
+        path = self.tmp_path / name
+        path.write_text(json.dumps(content))
+        return str(path)
+
+    def test_schema_cache_reuses_compiled_schema(self):
+        cache = SchemaCache(max_entries=1)
+        raw = json.dumps(MINIMAL_SCHEMA).encode('utf-8')
+        first = cache.get(raw)
+        second = cache.get(raw)
+        self.assertIs(first, second)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+        # A different schema evicts the least recently used entry
+        cache.get(json.dumps(dict(MINIMAL_SCHEMA, version='2.0')).encode('utf-8'))
+        self.assertIsNot(cache.get(raw), first)
+
+    def test_validate_files_reports_messages(self):
+        schema_file = self.write_json('schema.json', MINIMAL_SCHEMA)
+        data_file = self.write_json('data.json', {'User': [{'id': 1}]})
+        report = validate_files(SchemaCache(), schema_file, data_file)
+        self.assertEqual(report['status'], 'ok')
+        self.assertIn("The Class 'User' is not found in schema", report['warnings'])
+
+    def test_validate_files_replays_schema_errors(self):
+        schema_file = self.write_json('schema.json', {'tables': []})
+        data_file = self.write_json('data.json', {})
+        cache = SchemaCache()
+        for _ in range(2):
+            report = validate_files(cache, schema_file, data_file)
+            self.assertEqual(report['status'], 'failed')
+            self.assertIn("Schema is missing required key: 'version'", report['structural_errors'])
@@ -0,0 +1,77 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from utils.data_index import DataFileIndex, IndexedData, TableSelection, scan_tables
+
+
+DATA = {
+    'Site': [{'id': 1, 'name': 'Alpha ]}'}, {'id': 2, 'name': 'Be"ta'}],
+    'Sensor': [{'id': index, 'site_id': index % 3, 'tags': [1, {'nested': True}]} for index in range(10)],
+    'Empty': [],
+    'Mixed': [{'id': 1}, 5, 'text']
+}
+
+
+class TestDataFileIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp_dir.name) / 'data.json'
+        self.path.write_text(json.dumps(DATA, indent=2))
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_tables_and_row_slices_are_parsed_from_the_index(self):
+        index = DataFileIndex.build(str(self.path))
+        self.assertEqual(index.tables(), ['Site', 'Sensor', 'Empty', 'Mixed'])
+        self.assertEqual(index.row_count('Sensor'), 10)
+        self.assertEqual(index.load_table('Site'), DATA['Site'])
+        self.assertEqual(index.load_table('Sensor', 3, 6), DATA['Sensor'][3:6])
+        self.assertEqual(index.load_table('Empty'), [])
+        self.assertEqual(index.load_table('Mixed'), DATA['Mixed'])
+        with self.assertRaises(ValueError):
+            index.load_table('Mixed', 1)
+        index.close()
+
+    def test_sidecar_is_reused_until_the_file_changes(self):
+        DataFileIndex.build(str(self.path))
+        self.assertIsNotNone(DataFileIndex.load(str(self.path)))
+        self.path.write_text(json.dumps({'Site': []}))
+        self.assertIsNone(DataFileIndex.load(str(self.path)))
+
+    def test_documents_that_are_not_objects_of_arrays_are_rejected(self):
+        with self.assertRaises(ValueError):
+            scan_tables(b'{"Site": [], "Sensor": 5}')
+        self.path.write_text('[1, 2]')
+        self.assertIsNone(DataFileIndex.load_or_build(str(self.path)))
+
+    def test_malformed_top_level_is_rejected(self):
+        for document in [
+            b'{"A": [{"x": 1}] "B" [{"y": 2}]}',
+            b'{"A": [{"x": 1}], "B": [{"y": 2}]} {"C": []}',
+            b'{"A": [], "A": [{"x": 1}]}',
+            b'{"A": [{"x": 1}],}',
+            b'{"A": [{"x": 1} {"x": 2}]}'
+        ]:
+            with self.assertRaises(ValueError, msg=document):
+                scan_tables(document)
+            self.path.write_bytes(document)
+            self.assertIsNone(DataFileIndex.load_or_build(str(self.path)))
+
+    def test_index_is_kept_in_memory_when_the_sidecar_cannot_be_written(self):
+        with mock.patch('utils.data_index.os.replace', side_effect=PermissionError('read-only')):
+            index = DataFileIndex.load_or_build(str(self.path))
+        self.assertIsNotNone(index)
+        self.assertEqual(index.load_table('Site'), DATA['Site'])
+        self.assertFalse(Path(DataFileIndex.sidecar_path(str(self.path))).exists())
+        self.assertFalse(Path(DataFileIndex.sidecar_path(str(self.path)) + '.tmp').exists())
+        index.close()
+
+    def test_table_selection_still_resolves_other_tables(self):
+        data = TableSelection(IndexedData(DataFileIndex.build(str(self.path))), ['Sensor'])
+        self.assertEqual(list(data), ['Sensor'])
+        self.assertIn('Site', data)
+        self.assertEqual(data['Site'], DATA['Site'])
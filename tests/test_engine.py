@@ -0,0 +1,69 @@
+import gzip
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from main import SchemaValidatorLogger, validate_data
+from tests.fixtures import site_sensor_schema
+from utils import engine
+from utils.data_index import IndexedData
+from utils.engine import count_rows, load_data, plan_engine
+
+
+SCHEMA = site_sensor_schema()
+
+DATA = {
+    'Site': [{'id': number} for number in range(200)],
+    'Sensor': [{'site_id': number % 250, 'name': '{not a [row]}'} for number in range(1000)]
+}
+
+
+class TestEnginePlan(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.data_file = os.path.join(self.directory.name, 'data.json')
+        with open(self.data_file, 'w') as f:
+            json.dump(DATA, f)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_count_rows_ignores_strings(self):
+        with open(self.data_file, 'rb') as f:
+            self.assertEqual(count_rows(f.read()), {'Site': 200, 'Sensor': 1000})
+
+    def test_rows_are_extrapolated_from_sample(self):
+        with mock.patch.object(engine, 'SAMPLE_BYTES', 4096):
+            plan = plan_engine(SCHEMA, self.data_file, memory=1 << 30, cpus=4)
+        self.assertFalse(plan.profile.exact)
+        self.assertGreater(plan.profile.rows, 600)
+        self.assertEqual(plan.engine, 'memory')
+        self.assertEqual(plan.workers, 1)
+        self.assertEqual(plan.fk_backend, 'hash')
+
+    def test_large_input_is_indexed(self):
+        plan = plan_engine(SCHEMA, self.data_file, memory=64 << 10, cpus=4)
+        self.assertEqual(plan.engine, 'indexed')
+        self.assertEqual(plan.fk_backend, 'compact')
+        data = load_data(self.data_file, plan.engine)
+        self.assertIsInstance(data, IndexedData)
+        # Only one parsed table is kept once validation has read them all
+        validate_data(data, SchemaValidatorLogger())
+        self.assertEqual(len(data.cache), 1)
+        self.assertEqual(plan_engine(SCHEMA, self.data_file).profile.rows, 1200)
+
+    def test_compressed_input_is_parsed_whole(self):
+        compressed_file = f'{self.data_file}.gz'
+        with gzip.open(compressed_file, 'wt') as f:
+            json.dump(DATA, f)
+        plan = plan_engine(SCHEMA, compressed_file, memory=64 << 10, cpus=4)
+        self.assertEqual(plan.profile.compression, 'gzip')
+        self.assertEqual(plan.profile.rows, 1200)
+        self.assertEqual(plan.engine, 'memory')
+        self.assertEqual(load_data(compressed_file, plan.engine), DATA)
+
+
+if __name__ == '__main__':
+    unittest.main()
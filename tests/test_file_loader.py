@@ -0,0 +1,50 @@
+import bz2
+import gzip
+import io
+import json
+import lzma
+import tempfile
+import unittest
+from pathlib import Path
+
+from utils.file_loader import detect_compression, exceeds_size, is_zip_archive, load_json_file
+
+
+class TestFileLoader(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.tmp_path = Path(self.tmp_dir.name)
+        self.content = {'User': [{'id': 1, 'name': 'Ada'}]}
+        self.raw = json.dumps(self.content).encode('utf-8')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_compressed_files_are_detected_by_magic_bytes(self):
+        # The file names are deliberately misleading, only the content counts
+        for name, compress in [('gzip', gzip.compress), ('bz2', bz2.compress), ('xz', lzma.compress)]:
+            with self.subTest(compression=name):
+                path = self.tmp_path / f'{name}.json'
+                path.write_bytes(compress(self.raw))
+                self.assertEqual(detect_compression(path), name)
+                self.assertEqual(load_json_file(path), self.content)
+
+    def test_plain_json_is_loaded_unchanged(self):
+        path = self.tmp_path / 'data.json.gz'
+        path.write_bytes(self.raw)
+        self.assertIsNone(detect_compression(path))
+        self.assertEqual(load_json_file(path), self.content)
+
+    def test_detection_keeps_stream_position(self):
+        stream = io.BytesIO(gzip.compress(self.raw))
+        self.assertEqual(detect_compression(stream), 'gzip')
+        self.assertFalse(is_zip_archive(stream))
+        self.assertEqual(stream.tell(), 0)
+
+    def test_size_limit_applies_to_decompressed_content(self):
+        path = self.tmp_path / 'zeros.json.gz'
+        path.write_bytes(gzip.compress(b' ' * 100000))
+        self.assertLess(path.stat().st_size, 1000)
+        self.assertTrue(exceeds_size(path, 99999))
+        self.assertFalse(exceeds_size(path, 100000))
+
@@ -0,0 +1,100 @@
+import json
+import os
+import tempfile
+import unittest
+
+from main import SchemaValidatorLogger, run_validation, validate_foreign_keys, validate_properties
+from tests.fixtures import site_sensor_schema
+from utils.key_index import CompactKeySet, KeyIndex, KeyIndexRegistry, build_compact_key_buffers
+from utils.reference_store import ReferenceStore, foreign_key_targets
+
+
+SCHEMA = site_sensor_schema()
+
+
+class TestKeySets(unittest.TestCase):
+    def test_compact_key_set_matches_python_equality(self):
+        values = [1, 2.0, 'a', True, None, [1, 2], {'b': 1, 'a': 2}]
+        key_set = CompactKeySet(*build_compact_key_buffers(values))
+        index = KeyIndex()
+        for value in values:
+            index.add(value)
+        for probe in [1, 1.0, 2, 'a', 'b', 3, [1, 2], [2, 1], {'a': 2, 'b': 1}, False]:
+            self.assertEqual(probe in key_set, probe in index, probe)
+
+    def test_empty_key_set(self):
+        key_set = CompactKeySet(*build_compact_key_buffers([]))
+        self.assertEqual(len(key_set), 0)
+        self.assertNotIn(1, key_set)
+
+
+class TestUniqueProperty(unittest.TestCase):
+    def unique_schema(self, value=True):
+        schema = json.loads(json.dumps(SCHEMA))
+        schema['tables'][0]['columns'][0]['properties'] = [{'type': 'unique-prop', 'value': value}]
+        return schema
+
+    def test_duplicates_reported_with_counts_and_capped_sample(self):
+        data = {'Site': [{'id': number % 4} for number in range(30)] + [{'id': 7}, {'id': None}, {'id': None}]}
+        logger = SchemaValidatorLogger()
+        validate_properties(data, self.unique_schema(), logger)
+        self.assertEqual(len(logger.errors), 4)
+        self.assertEqual(
+            logger.errors[0],
+            'Validation failed for id with value 0 against property unique: 8 occurrences in Site at rows 0, 4, 8, 12, 16 and 3 more'
+        )
+
+        logger = SchemaValidatorLogger()
+        validate_properties(data, self.unique_schema('false'), logger)
+        self.assertEqual(logger.errors, [])
+
+    def test_index_is_shared_with_foreign_keys(self):
+        registry = KeyIndexRegistry()
+        data = {'Site': [{'id': 1}, {'id': 1}], 'Sensor': [{'site_id': 1}, {'site_id': 2}]}
+        logger = SchemaValidatorLogger()
+        run_validation(data, self.unique_schema(), logger, key_indexes=registry)
+        self.assertEqual(list(registry.indexes), [('Site', 'id')])
+        self.assertEqual(logger.warnings, ['The object Sensor.site_id with value 2 is not related to any Site.id in the data'])
+        self.assertEqual(logger.errors, ['Validation failed for id with value 1 against property unique: 2 occurrences in Site at rows 0, 1'])
+
+
+class TestReferenceStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.reference_file = os.path.join(self.directory.name, 'sites.json')
+        with open(self.reference_file, 'w') as f:
+            json.dump({'Site': [{'id': number} for number in range(5)]}, f)
+        self.store = ReferenceStore(os.path.join(self.directory.name, 'store'))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_register_is_versioned_by_content(self):
+        targets = foreign_key_targets(SCHEMA)
+        self.assertEqual(targets, {('Site', 'id')})
+        digest = self.store.register(self.reference_file, targets)
+        self.assertEqual(self.store.register(self.reference_file, targets), digest)
+
+        with open(self.reference_file, 'w') as f:
+            json.dump({'Site': [{'id': 9}]}, f)
+        self.assertNotEqual(self.store.register(self.reference_file, targets), digest)
+        self.assertIn(9, self.store.open(self.reference_file, targets)[('Site', 'id')])
+
+    def test_foreign_keys_resolve_against_reference(self):
+        key_sets = self.store.open(self.reference_file, foreign_key_targets(SCHEMA))
+        data = {'Sensor': [{'site_id': 1}, {'site_id': 7}, {'site_id': None}]}
+        logger = SchemaValidatorLogger()
+        validate_foreign_keys(data, SCHEMA, logger, key_indexes=KeyIndexRegistry(key_sets))
+        self.assertEqual(logger.warnings, [
+            'The object Sensor.site_id with value 7 is not related to any Site.id in the reference data'
+        ])
+
+        logger = SchemaValidatorLogger()
+        validate_foreign_keys(data, SCHEMA, logger)
+        self.assertEqual(logger.warnings, [
+            "Related table 'Site' not found in data for foreign key 'site_id' in table 'Sensor'"
+        ])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+import unittest
+
+from utils.logger import SchemaValidatorLogger
+from utils.report import ValidationReport
+
+
+class TestValidationReport(unittest.TestCase):
+    def setUp(self):
+        logger = SchemaValidatorLogger()
+        for _ in range(3):
+            logger.add_message("Value 'abc' is not compatible with INT type", 'error', table='Sensor', column='value')
+        logger.add_message("Value 'abc' is not compatible with INT type", 'error', table='Site', column='id')
+        for number in range(5):
+            logger.add_message(f"Validation failed for name with value {number} against property regex", 'error',
+                               table='Site', column='name')
+        logger.add_message("The Class 'Ghost' is not found in data", 'info', table='Ghost')
+        self.report = ValidationReport(logger)
+
+    def test_messages_are_grouped_with_counts(self):
+        self.assertEqual(self.report.summary(), {'structural_errors': 0, 'errors': 6, 'warnings': 0, 'info': 1})
+        first = self.report.page('errors')['items'][0]
+        self.assertEqual(first['count'], 4)
+        self.assertEqual(first['tables'], ['Sensor', 'Site'])
+        self.assertEqual(first['columns'], ['id', 'value'])
+
+    def test_pages_are_filtered_server_side(self):
+        result = self.report.page('errors', page=2, per_page=2, table='Site', column='name')
+        self.assertEqual(result['total'], 5)
+        self.assertTrue(result['has_more'])
+        self.assertEqual([item['message'] for item in result['items']],
+                         ["Validation failed for name with value 2 against property regex",
+                          "Validation failed for name with value 3 against property regex"])
+        self.assertEqual(result['counts'], {'structural_errors': 0, 'errors': 5, 'warnings': 0, 'info': 0})
+
+        result = self.report.page('errors', text='INT TYPE')
+        self.assertEqual(result['total'], 1)
+
+    def test_unknown_severity_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self.report.page('fatal')
@@ -0,0 +1,100 @@
+import copy
+import json
+import os
+import tempfile
+import unittest
+from collections import Counter
+
+from main import SchemaValidatorLogger, run_validation, run_delta_validation
+from tests.fixtures import site_sensor_schema
+from utils.schema_diff import diff_schemas, load_validation_state, save_validation_state
+
+
+SCHEMA = site_sensor_schema(
+    site_id_properties=[{'type': 'no-less-than-prop', 'value': 0}],
+    site_columns=[
+        {'uuid': 'c-site-name', 'name': 'name', 'type': 'ct-varchar', 'relationship': None, 'properties': None}
+    ],
+    sensor_columns=[
+        {'uuid': 'c-sensor-value', 'name': 'value', 'type': 'ct-varchar', 'relationship': None, 'properties': None}
+    ],
+    column_types=[{'uuid': 'ct-varchar', 'name': 'VARCHAR(255)'}]
+)
+
+DATA = {
+    'Site': [{'id': number - 2, 'name': f'Site {number}'} for number in range(6)],
+    'Sensor': [{'site_id': number, 'value': ['1.5', 'abc', 7][number % 3]} for number in range(8)]
+}
+
+
+def saved_state(schema, references=()):
+    logger = SchemaValidatorLogger()
+    run_validation(DATA, schema, logger)
+    findings = [
+        [message_type, message, table, column, phase, count]
+        for (message_type, message), locations in logger.locations.items()
+        for (table, column, phase), count in locations.items()
+    ]
+    return {'schema': schema, 'references': sorted(references), 'findings': findings}
+
+
+class TestSchemaDelta(unittest.TestCase):
+    def assert_delta_matches_full_run(self, new_schema, old_references=(), new_references=()):
+        expected = SchemaValidatorLogger()
+        run_validation(DATA, new_schema, expected)
+        actual = SchemaValidatorLogger()
+        delta = run_delta_validation(DATA, new_schema, actual, saved_state(SCHEMA, old_references),
+                                     references=new_references)
+        for severity in ['info', 'warnings', 'errors', 'structural_errors']:
+            self.assertEqual(Counter(getattr(actual, severity)), Counter(getattr(expected, severity)))
+        return delta
+
+    def test_type_change_only_affects_that_column(self):
+        new_schema = copy.deepcopy(SCHEMA)
+        new_schema['tables'][1]['columns'][1]['type'] = 'ct-int'
+        delta = self.assert_delta_matches_full_run(new_schema)
+        self.assertEqual(delta.values, {('Sensor', 'value')})
+        self.assertEqual(delta.foreign_keys, set())
+        self.assertFalse(delta.table_names)
+
+    def test_renamed_target_column_affects_referencing_foreign_keys(self):
+        new_schema = copy.deepcopy(SCHEMA)
+        new_schema['tables'][0]['columns'][0]['name'] = 'site_uuid'
+        delta = self.assert_delta_matches_full_run(new_schema)
+        self.assertIn(('Sensor', 'site_id'), delta.foreign_keys)
+        self.assertEqual(delta.tables, {'Site'})
+
+    def test_property_and_relationship_changes(self):
+        new_schema = copy.deepcopy(SCHEMA)
+        new_schema['tables'][0]['columns'][0]['properties'] = [{'type': 'no-less-than-prop', 'value': 2}]
+        new_schema['tables'][1]['columns'][0]['relationship'] = None
+        delta = self.assert_delta_matches_full_run(new_schema)
+        self.assertEqual(delta.values, {('Site', 'id')})
+        self.assertEqual(delta.foreign_keys, {('Sensor', 'site_id')})
+
+    def test_unchanged_schema_has_empty_delta(self):
+        self.assertTrue(diff_schemas(SCHEMA, copy.deepcopy(SCHEMA)).is_empty())
+
+    def test_changed_references_affect_every_foreign_key(self):
+        delta = self.assert_delta_matches_full_run(copy.deepcopy(SCHEMA), ['a' * 64], ['b' * 64])
+        self.assertEqual(delta.foreign_keys, {('Sensor', 'site_id')})
+        self.assertEqual(delta.values, set())
+        self.assertIn('Reference datasets changed', delta.changes)
+
+    def test_same_references_in_any_order_have_empty_delta(self):
+        delta = self.assert_delta_matches_full_run(copy.deepcopy(SCHEMA), ['a' * 64, 'b' * 64], ['b' * 64, 'a' * 64])
+        self.assertTrue(delta.is_empty())
+
+    def test_saved_state_records_references(self):
+        with tempfile.TemporaryDirectory() as directory:
+            data_file = os.path.join(directory, 'data.json')
+            state_file = os.path.join(directory, 'state.json')
+            with open(data_file, 'w') as f:
+                json.dump(DATA, f)
+            logger = SchemaValidatorLogger()
+            run_validation(DATA, SCHEMA, logger)
+            save_validation_state(state_file, SCHEMA, data_file, logger, ['b' * 64, 'a' * 64])
+
+            state = load_validation_state(state_file, data_file)
+
+        self.assertEqual(state['references'], ['a' * 64, 'b' * 64])
@@ -0,0 +1,80 @@
+import json
+import os
+import tempfile
+import unittest
+
+from tests.fixtures import site_sensor_schema
+from utils.key_index import CompactKeySet, build_bloom_buffer, build_compact_key_buffers
+from utils.shared_keys import SharedKeySets, attach_key_sets
+from utils.sharding import build_global_key_buffers, validate_shards
+
+
+SCHEMA = site_sensor_schema()
+
+SHARDS = [
+    {'Site': [{'id': 1}, {'id': 2}], 'Sensor': [{'site_id': 3}, {'site_id': 1}]},
+    {'Site': [{'id': 3}], 'Sensor': [{'site_id': 2}, {'site_id': 4}]},
+    {'Sensor': [{'site_id': 1}]}
+]
+
+
+class TestShardedValidation(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.shard_files = []
+        for number, shard in enumerate(SHARDS):
+            path = os.path.join(self.directory.name, f'shard{number}.json')
+            with open(path, 'w') as f:
+                json.dump(shard, f)
+            self.shard_files.append(path)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_global_key_index_spans_shards(self):
+        buffers = build_global_key_buffers(SCHEMA, self.shard_files, workers=2)
+        key_set = CompactKeySet(*buffers[('Site', 'id')])
+        self.assertEqual(len(key_set), 3)
+        self.assertIn(3, key_set)
+        self.assertNotIn(4, key_set)
+
+    def test_foreign_keys_resolve_across_shards(self):
+        reports = validate_shards(SCHEMA, self.shard_files, workers=2)
+        self.assertEqual([report['status'] for report in reports], ['ok', 'ok', 'ok'])
+        self.assertEqual(reports[0]['warnings'], [])
+        self.assertEqual(reports[1]['warnings'], [
+            'The object Sensor.site_id with value 4 is not related to any Site.id in the data'
+        ])
+        self.assertEqual(reports[2]['warnings'], [])
+        self.assertEqual(reports[2]['info'], ["The Class 'Site' is not found in data"])
+
+    def test_bloom_filter_prefilter(self):
+        reports = validate_shards(SCHEMA, self.shard_files, workers=2, bloom_bits_per_key=10)
+        self.assertEqual([report['warnings'] for report in reports], [
+            [], ['The object Sensor.site_id with value 4 is not related to any Site.id in the data'], []
+        ])
+
+
+class TestSharedKeySets(unittest.TestCase):
+    def test_published_key_sets_match_exactly(self):
+        values = list(range(0, 2000, 2)) + ['a', 'b']
+        buffers = build_compact_key_buffers(values)
+        with SharedKeySets({('Site', 'id'): buffers}, bloom_bits_per_key=4) as shared_key_sets:
+            key_set = attach_key_sets(shared_key_sets.descriptors)[('Site', 'id')]
+            self.assertIsNotNone(key_set.bloom)
+            for value in values:
+                self.assertIn(value, key_set)
+            # Bloom filter false positives are confirmed against the keys
+            for value in range(1, 2000, 2):
+                self.assertNotIn(value, key_set)
+            del key_set
+
+    def test_bloom_filter_has_no_false_negatives(self):
+        hashes, offsets, keys = build_compact_key_buffers(range(500))
+        key_set = CompactKeySet(hashes, offsets, keys, bloom=build_bloom_buffer(hashes, 2))
+        self.assertTrue(all(value in key_set for value in range(500)))
+        self.assertEqual(len(CompactKeySet(*build_compact_key_buffers([]), bloom=build_bloom_buffer(b''))), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
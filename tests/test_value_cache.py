@@ -0,0 +1,46 @@
+import unittest
+
+from utils.value_cache import ValueCache, cached_findings
+
+
+class TestValueCache(unittest.TestCase):
+    def test_findings_are_computed_once_per_value(self):
+        cache = ValueCache('type Sensor.status')
+        calls = []
+
+        def compute(recorder):
+            calls.append(1)
+            recorder.add_message("Value 'yes' was converted to BOOLEAN type.", 'warning')
+
+        for _ in range(3):
+            findings = cached_findings(cache, 'yes', compute)
+        self.assertEqual(findings, [("Value 'yes' was converted to BOOLEAN type.", 'warning')])
+        self.assertEqual(len(calls), 1)
+        self.assertEqual((cache.hits, cache.misses), (2, 1))
+
+    def test_values_of_different_types_are_kept_apart(self):
+        cache = ValueCache('type Sensor.active')
+        cached_findings(cache, True, lambda recorder: None)
+        findings = cached_findings(cache, 1, lambda recorder: recorder.add_message('int', 'info'))
+        self.assertEqual(findings, [('int', 'info')])
+
+    def test_high_cardinality_disables_cache(self):
+        cache = ValueCache('type Sensor.id', max_entries=4)
+        for value in range(10):
+            cached_findings(cache, value, lambda recorder: None)
+        self.assertFalse(cache.enabled)
+        self.assertEqual(cache.disabled_reason, 'high cardinality')
+        self.assertEqual(cache.entries, {})
+
+    def test_low_hit_rate_disables_cache(self):
+        cache = ValueCache('type Sensor.reading', warmup_lookups=8)
+        for value in range(10):
+            cached_findings(cache, value, lambda recorder: None)
+        self.assertFalse(cache.enabled)
+        self.assertEqual(cache.disabled_reason, 'low hit rate')
+
+    def test_unhashable_values_are_not_cached(self):
+        cache = ValueCache('type Sensor.tags')
+        for _ in range(2):
+            cached_findings(cache, [1, 2], lambda recorder: None)
+        self.assertEqual((cache.hits, cache.misses), (0, 0))
@@ -0,0 +1,144 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import Counter
+
+from utils.logger import DIAGNOSTICS_LOGGER
+
+
+DEFAULT_CHECKPOINT_DIR = os.path.join('.valigator', 'checkpoints')
+DEFAULT_INTERVAL = 30.0
+CHECKPOINT_VERSION = 3
+
+SEVERITIES = ('info', 'warnings', 'errors', 'structural_errors')
+
+
+def file_fingerprint(path):
+    """Cheap identity of a file: its absolute path, size and modification time"""
+    stat = os.stat(path)
+    return [os.path.abspath(path), stat.st_size, stat.st_mtime_ns]
+
+
+class ValidationCheckpoint:
+    """Periodically persists the progress of a validation run so it can be resumed.
+
+    A checkpoint records the position the run reached (phase, table and row offset,
+    everything before it is done), the foreign key warnings already reported and
+    all findings accumulated so far. It is keyed by the fingerprints of the schema
+    and data files, so changing either file invalidates it.
+
+    The findings go to a journal next to the checkpoint that each save only
+    appends the messages added since the previous save to. The checkpoint records
+    the journal size it is consistent with, anything after it is from an
+    interrupted save and is ignored.
+    """
+
+    def __init__(self, fingerprint, directory=DEFAULT_CHECKPOINT_DIR, interval=DEFAULT_INTERVAL):
+        self.fingerprint = fingerprint
+        key = hashlib.sha256(json.dumps(fingerprint).encode('utf-8')).hexdigest()
+        self.path = os.path.join(directory, f'{key}.json')
+        self.journal_path = os.path.join(directory, f'{key}.messages')
+        self.interval = interval
+        self.last_save = time.monotonic()
+        # Messages of each severity and bytes already in the journal
+        self.journaled = dict.fromkeys(SEVERITIES, 0)
+        self.journal_size = 0
+        self.logger = logging.getLogger(DIAGNOSTICS_LOGGER)
+
+    @classmethod
+    def for_files(cls, schema_path, data_path, directory=DEFAULT_CHECKPOINT_DIR, interval=DEFAULT_INTERVAL, scope=None):
+        """Checkpoint of a run on the given files, scope distinguishes runs over parts of them"""
+        return cls([file_fingerprint(schema_path), file_fingerprint(data_path), scope], directory, interval)
+
+    def load(self):
+        """Return the saved state, or None if there is no usable checkpoint"""
+        try:
+            with open(self.path, 'r') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if state.get('version') != CHECKPOINT_VERSION or state.get('fingerprint') != self.fingerprint:
+            return None
+        try:
+            if os.path.getsize(self.journal_path) < state['journal_size']:
+                return None
+        except OSError:
+            return None
+        self.logger.info(f"Resuming validation at phase {state['phase']}, table {state['table']}, row {state['offset']}")
+        return state
+
+    def save(self, logger, phase, table, offset, fk_warnings, force=False):
+        """Save the position the run reached if the checkpoint interval has elapsed"""
+        now = time.monotonic()
+        if not force and now - self.last_save < self.interval:
+            return
+        self.last_save = now
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.append_journal(logger)
+
+        state = {
+            'version': CHECKPOINT_VERSION,
+            'fingerprint': self.fingerprint,
+            'phase': phase,
+            'table': table,
+            'offset': offset,
+            'fk_warnings': sorted(fk_warnings),
+            'journal_size': self.journal_size,
+            'locations': [
+                [message_type, message, [[table, column, phase, count] for (table, column, phase), count in locations.items()]]
+                for (message_type, message), locations in logger.locations.items()
+            ]
+        }
+
+        # Write to a temporary file first so a crash never leaves a truncated checkpoint
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.path)
+
+    def append_journal(self, logger):
+        """Append the messages logger gained since the last save to the journal"""
+        if any(len(getattr(logger, severity)) < self.journaled[severity] for severity in SEVERITIES):
+            # Not the logger the journal was written for, start over
+            self.journaled = dict.fromkeys(SEVERITIES, 0)
+            self.journal_size = 0
+
+        mode = 'r+b' if self.journal_size and os.path.exists(self.journal_path) else 'wb'
+        with open(self.journal_path, mode) as f:
+            # Drop what an interrupted save left after the last consistent size
+            f.seek(self.journal_size)
+            f.truncate()
+            for severity in SEVERITIES:
+                messages = getattr(logger, severity)
+                for message in messages[self.journaled[severity]:]:
+                    f.write(json.dumps([severity, message]).encode('utf-8') + b'\n')
+                self.journaled[severity] = len(messages)
+            self.journal_size = f.tell()
+
+    def restore_logger(self, state, logger):
+        """Replace the findings of logger with the ones saved in state"""
+        messages = {severity: [] for severity in SEVERITIES}
+        with open(self.journal_path, 'rb') as f:
+            journal = f.read(state['journal_size'])
+        for line in journal.splitlines():
+            severity, message = json.loads(line)
+            messages[severity].append(message)
+        for severity in SEVERITIES:
+            setattr(logger, severity, messages[severity])
+        # Later saves continue the journal where the restored state ends
+        self.journaled = {severity: len(messages[severity]) for severity in SEVERITIES}
+        self.journal_size = state['journal_size']
+        logger.locations = {
+            (message_type, message): Counter({(table, column, phase): count for table, column, phase, count in locations})
+            for message_type, message, locations in state['locations']
+        }
+
+    def clear(self):
+        for path in (self.path, self.journal_path):
+            if os.path.exists(path):
+                os.unlink(path)
+        self.journaled = dict.fromkeys(SEVERITIES, 0)
+        self.journal_size = 0
@@ -0,0 +1,171 @@
+import hashlib
+import json
+import logging
+import os
+import socket
+import socketserver
+import threading
+from collections import OrderedDict
+
+from utils.file_loader import load_json_file, read_bytes
+from utils.logger import DIAGNOSTICS_LOGGER, SchemaValidatorLogger
+
+
+DEFAULT_SOCKET_PATH = '/tmp/valigator.sock'
+DEFAULT_CACHE_SIZE = 16
+
+
+class CompiledSchema:
+    """A parsed schema together with the outcome of its structural validation"""
+
+    def __init__(self, schema, digest, structural_errors, error=None):
+        self.schema = schema
+        self.digest = digest
+        self.structural_errors = structural_errors
+        self.error = error
+
+
+def compile_schema(raw_schema, digest):
+    """Parse and structurally validate a schema once so it can be reused across requests"""
+    from main import validate_schema
+
+    schema = json.loads(raw_schema)
+    logger = SchemaValidatorLogger()
+    try:
+        validate_schema(schema, logger)
+    except ValueError as e:
+        return CompiledSchema(schema, digest, logger.structural_errors, error=str(e))
+    return CompiledSchema(schema, digest, logger.structural_errors)
+
+
+class SchemaCache:
+    """Thread-safe LRU of compiled schemas keyed by the SHA-256 of the schema file content"""
+
+    def __init__(self, max_entries=DEFAULT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, raw_schema):
+        digest = hashlib.sha256(raw_schema).hexdigest()
+        with self.lock:
+            compiled = self.entries.get(digest)
+            if compiled is not None:
+                self.entries.move_to_end(digest)
+                self.hits += 1
+                return compiled
+            self.misses += 1
+
+        compiled = compile_schema(raw_schema, digest)
+
+        with self.lock:
+            self.entries[digest] = compiled
+            self.entries.move_to_end(digest)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return compiled
+
+
+def validate_files(schema_cache, schema_file, data_file):
+    """Validate a data file against a schema file, returning the report as a dictionary"""
+    from main import validate_data, run_validation
+
+    logger = SchemaValidatorLogger()
+
+    def report(status):
+        return {
+            'status': status,
+            'info': logger.info,
+            'warnings': logger.warnings,
+            'errors': logger.errors,
+            'structural_errors': logger.structural_errors
+        }
+
+    try:
+        compiled = schema_cache.get(read_bytes(schema_file))
+    except Exception as e:
+        logger.add_message(f"Error reading schema file: {e}", 'error')
+        return report('failed')
+
+    try:
+        data = load_json_file(data_file)
+    except Exception as e:
+        logger.add_message(f"Error reading data file: {e}", 'error')
+        return report('failed')
+
+    # Replay the outcome of the cached structural validation
+    for message in compiled.structural_errors:
+        logger.add_message(message, 'structural_error')
+    if compiled.error is not None:
+        logger.add_message(f"Schema validation error: {compiled.error}", 'error')
+        return report('failed')
+
+    try:
+        validate_data(data, logger)
+    except ValueError as e:
+        logger.add_message(f"Data validation error: {e}", 'error')
+        return report('failed')
+
+    run_validation(data, compiled.schema, logger)
+    return report('ok')
+
+
+class ValidationRequestHandler(socketserver.StreamRequestHandler):
+    """Handles one newline-delimited JSON request and answers with one JSON line"""
+
+    def handle(self):
+        line = self.rfile.readline()
+        if not line:
+            return
+        try:
+            request = json.loads(line)
+            response = validate_files(self.server.schema_cache, request['schema_file'], request['data_file'])
+        except (ValueError, KeyError, TypeError) as e:
+            response = {'status': 'failed', 'info': [], 'warnings': [],
+                        'errors': [f"Invalid daemon request: {e}"], 'structural_errors': []}
+        self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+
+
+class ValidationDaemon(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path, cache_size=DEFAULT_CACHE_SIZE):
+        # Remove a stale socket left behind by a previous daemon
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        super().__init__(socket_path, ValidationRequestHandler)
+        self.socket_path = socket_path
+        self.schema_cache = SchemaCache(cache_size)
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+
+def serve(socket_path=DEFAULT_SOCKET_PATH, cache_size=DEFAULT_CACHE_SIZE):
+    """Run the validation daemon until interrupted"""
+    logger = logging.getLogger(DIAGNOSTICS_LOGGER)
+    server = ValidationDaemon(socket_path, cache_size)
+    logger.info(f'Validation daemon listening on {socket_path}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def request_validation(socket_path, schema_file, data_file):
+    """Send a validation request to a running daemon and return its report"""
+    request = {
+        'schema_file': os.path.abspath(schema_file),
+        'data_file': os.path.abspath(data_file)
+    }
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(socket_path)
+        sock.sendall(json.dumps(request).encode('utf-8') + b'\n')
+        with sock.makefile('rb') as f:
+            return json.loads(f.readline())
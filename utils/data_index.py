@@ -0,0 +1,341 @@
+import hashlib
+import json
+import logging
+import mmap
+import os
+import re
+from array import array
+from collections import OrderedDict
+from collections.abc import Mapping
+
+from utils.file_loader import detect_compression
+
+
+INDEX_VERSION = 1
+INDEX_SUFFIX = '.idx'
+
+# Strings are matched whole so that brackets and commas inside them are skipped
+TOKEN_PATTERN = re.compile(rb'"(?:[^"\\]|\\.)*"|[{}\[\],]')
+EMPTY_ARRAY_PATTERN = re.compile(rb'[ \t\n\r]*\]')
+
+WHITESPACE_PATTERN = re.compile(rb'[ \t\n\r]*')
+STRING = rb'"[^"\\]*(?:\\.[^"\\]*)*"'
+# A top-level member name up to the start of its value
+KEY_PATTERN = re.compile(rb'[ \t\n\r]*(' + STRING + rb')[ \t\n\r]*:[ \t\n\r]*')
+MEMBER_END_PATTERN = re.compile(rb'[ \t\n\r]*([,}])')
+# A row without nested objects or arrays along with the separator after it, matched in one step
+FLAT_ROW_PATTERN = re.compile(
+    rb'[ \t\n\r]*(\{[^{}\[\]"]*(?:' + STRING + rb'[^{}\[\]"]*)*\})[ \t\n\r]*([,\]])'
+)
+ELEMENT_END_PATTERN = re.compile(rb'[ \t\n\r]*([,\]])')
+SCALAR_PATTERN = re.compile(STRING + rb'|[^,\]{}\[ \t\n\r]+')
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def scan_tables(buffer):
+    """Find the byte ranges of the top-level arrays of a JSON object and of the objects in them.
+
+    Returns a list of (table, array_start, array_end, objects_only, offsets) where offsets
+    is a flat array of the start and end of every object. The end offsets are exclusive.
+    Rows without nested objects or arrays are matched by a single regular expression,
+    only rows with nested values are walked token by token. The top level is checked
+    strictly, the content of the rows is left to the parser that loads them. Raises
+    ValueError if the document is not an object whose values are all arrays, has a
+    table more than once or is followed by other content.
+    """
+    tables = []
+    names = set()
+
+    position = WHITESPACE_PATTERN.match(buffer).end()
+    if buffer[position:position + 1] != b'{':
+        raise ValueError("Data must be a JSON object")
+    position += 1
+
+    end = MEMBER_END_PATTERN.match(buffer, position)
+    if end is not None and end.group(1) == b'}':
+        position = end.end()
+    else:
+        while True:
+            key = KEY_PATTERN.match(buffer, position)
+            if key is None:
+                raise ValueError(f"Expected a table name at byte {position}")
+            table = json.loads(key.group(1))
+            if table in names:
+                raise ValueError(f"The class '{table}' appears more than once")
+            names.add(table)
+
+            start = key.end()
+            if buffer[start:start + 1] != b'[':
+                raise ValueError(f"The value for class '{table}' is not a list")
+            position, elements, offsets = scan_rows(buffer, start + 1)
+            tables.append((table, start, position, elements == len(offsets) // 2, offsets))
+
+            end = MEMBER_END_PATTERN.match(buffer, position)
+            if end is None:
+                raise ValueError(f"Expected ',' or '}}' after class '{table}' at byte {position}")
+            position = end.end()
+            if end.group(1) == b'}':
+                break
+
+    if WHITESPACE_PATTERN.match(buffer, position).end() != len(buffer):
+        raise ValueError(f"Unexpected content after the JSON document at byte {position}")
+    return tables
+
+
+def scan_rows(buffer, position):
+    """Scan the elements of the array starting at position (just after its '[').
+
+    Returns the position after the closing ']', the number of elements and the
+    offsets of the elements that are objects.
+    """
+    offsets = array('Q')
+    empty = EMPTY_ARRAY_PATTERN.match(buffer, position)
+    if empty is not None:
+        return empty.end(), 0, offsets
+
+    elements = 0
+    while True:
+        elements += 1
+        row = FLAT_ROW_PATTERN.match(buffer, position)
+        if row is not None:
+            offsets.append(row.start(1))
+            offsets.append(row.end(1))
+            position = row.end()
+            if row.group(2) == b']':
+                return position, elements, offsets
+            continue
+
+        start = WHITESPACE_PATTERN.match(buffer, position).end()
+        first = buffer[start:start + 1]
+        if first in (b'{', b'['):
+            position = skip_nested(buffer, start)
+            if first == b'{':
+                offsets.append(start)
+                offsets.append(position)
+        else:
+            scalar = SCALAR_PATTERN.match(buffer, start)
+            if scalar is None:
+                raise ValueError(f"Expected an array element at byte {start}")
+            position = scalar.end()
+
+        end = ELEMENT_END_PATTERN.match(buffer, position)
+        if end is None:
+            raise ValueError(f"Expected ',' or ']' at byte {position}")
+        position = end.end()
+        if end.group(1) == b']':
+            return position, elements, offsets
+
+
+def skip_nested(buffer, position):
+    """Return the position after the object or array starting at position"""
+    depth = 0
+    for match in TOKEN_PATTERN.finditer(buffer, position):
+        first = buffer[match.start()]
+        if first in (0x7b, 0x5b):  # { [
+            depth += 1
+        elif first in (0x7d, 0x5d):  # } ]
+            depth -= 1
+            if depth == 0:
+                return match.end()
+    raise ValueError("Data file is not a complete JSON document")
+
+
+class DataFileIndex:
+    """Byte offsets of the tables and rows of a data file, for parsing slices of it.
+
+    The index is stored in a sidecar file next to the data file (data.json.idx): a
+    JSON header line describing the tables, followed by the start and end offsets
+    of every row as unsigned 64 bit integers. The header records the SHA-256 of the
+    data file the index was built from.
+    """
+
+    def __init__(self, path, header, offsets):
+        self.path = path
+        self.header = header
+        self.offsets = offsets
+        self.file = None
+        self.buffer = None
+
+    @staticmethod
+    def sidecar_path(path):
+        return f'{path}{INDEX_SUFFIX}'
+
+    @classmethod
+    def build(cls, path):
+        """Scan a data file and write its sidecar index"""
+        stat = os.stat(path)
+        offsets = array('Q')
+        tables = []
+        with open(path, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                for table, start, end, objects_only, table_offsets in scan_tables(buffer):
+                    tables.append({
+                        'name': table,
+                        'start': start,
+                        'end': end,
+                        'objects_only': objects_only,
+                        'first_row': len(offsets) // 2,
+                        'rows': len(table_offsets) // 2
+                    })
+                    offsets.extend(table_offsets)
+
+        header = {
+            'version': INDEX_VERSION,
+            'sha256': file_sha256(path),
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'tables': tables
+        }
+        sidecar = cls.sidecar_path(path)
+        try:
+            with open(f'{sidecar}.tmp', 'wb') as f:
+                f.write(json.dumps(header).encode('utf-8') + b'\n')
+                offsets.tofile(f)
+            os.replace(f'{sidecar}.tmp', sidecar)
+        except OSError as e:
+            # A read-only location only costs the index being rebuilt next time
+            logging.getLogger(__name__).warning(f"Could not save the index of {path}: {e}")
+            if os.path.exists(f'{sidecar}.tmp'):
+                os.unlink(f'{sidecar}.tmp')
+        return cls(path, header, offsets)
+
+    @classmethod
+    def load(cls, path):
+        """Load the sidecar index of a data file, or None if it is missing or stale"""
+        try:
+            with open(cls.sidecar_path(path), 'rb') as f:
+                header = json.loads(f.readline())
+                offsets = array('Q')
+                offsets.frombytes(f.read())
+        except (OSError, ValueError):
+            return None
+        if header.get('version') != INDEX_VERSION:
+            return None
+
+        # The hash is only recomputed when the file looks changed
+        stat = os.stat(path)
+        if (header['size'], header['mtime_ns']) != (stat.st_size, stat.st_mtime_ns):
+            if header['size'] != stat.st_size or header['sha256'] != file_sha256(path):
+                return None
+        return cls(path, header, offsets)
+
+    @classmethod
+    def load_or_build(cls, path):
+        """Return the index of a data file, building it if needed.
+
+        Returns None for compressed files, files that aren't an object of arrays and
+        files that can't be mapped, which have to be parsed as a whole.
+        """
+        if detect_compression(path) is not None or os.path.getsize(path) == 0:
+            return None
+        try:
+            return cls.load(path) or cls.build(path)
+        except (ValueError, OSError):
+            return None
+
+    def open(self):
+        if self.buffer is None:
+            self.file = open(self.path, 'rb')
+            self.buffer = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self.buffer
+
+    def close(self):
+        if self.buffer is not None:
+            self.buffer.close()
+            self.file.close()
+            self.buffer = None
+            self.file = None
+
+    def tables(self):
+        return [table['name'] for table in self.header['tables']]
+
+    def table_info(self, table):
+        for info in self.header['tables']:
+            if info['name'] == table:
+                return info
+        raise KeyError(table)
+
+    def row_count(self, table):
+        return self.table_info(table)['rows']
+
+    def load_table(self, table, start_row=0, end_row=None):
+        """Parse the rows of a table, or a slice of them, without parsing the rest of the file"""
+        info = self.table_info(table)
+        buffer = self.open()
+        if start_row == 0 and end_row is None:
+            return json.loads(buffer[info['start']:info['end']])
+        if not info['objects_only']:
+            raise ValueError(f"Rows of table '{table}' can't be sliced, not all of them are objects")
+
+        end_row = info['rows'] if end_row is None else min(end_row, info['rows'])
+        if start_row >= end_row:
+            return []
+        first = (info['first_row'] + start_row) * 2
+        last = (info['first_row'] + end_row) * 2 - 1
+        return json.loads(b'[' + buffer[self.offsets[first]:self.offsets[last]] + b']')
+
+
+class IndexedData(Mapping):
+    """Read-only data mapping that parses each table from its slice of the file on access.
+
+    At most cache_size parsed tables are kept (all of them if None).
+    """
+
+    def __init__(self, index, cache_size=None):
+        self.index = index
+        self.names = index.tables()
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+
+    def __getitem__(self, table):
+        if table in self.cache:
+            self.cache.move_to_end(table)
+            return self.cache[table]
+        if table not in self.names:
+            raise KeyError(table)
+        rows = self.index.load_table(table)
+        self.cache[table] = rows
+        if self.cache_size is not None:
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return rows
+
+    def __contains__(self, table):
+        return table in self.names
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __len__(self):
+        return len(self.names)
+
+
+class TableSelection(Mapping):
+    """Data view that only iterates over the selected tables.
+
+    Lookups still reach every table, so foreign keys into unselected tables resolve
+    and selected tables are not reported as missing from the data.
+    """
+
+    def __init__(self, data, tables):
+        self.data = data
+        self.tables = [table for table in data if table in tables]
+
+    def __getitem__(self, table):
+        return self.data[table]
+
+    def __contains__(self, table):
+        return table in self.data
+
+    def __iter__(self):
+        return iter(self.tables)
+
+    def __len__(self):
+        return len(self.tables)
@@ -0,0 +1,274 @@
+import bz2
+import lzma
+import os
+import zlib
+
+from utils.data_index import DataFileIndex, IndexedData, TOKEN_PATTERN
+from utils.file_loader import detect_compression, load_json_file
+from utils.reference_store import foreign_key_targets
+
+
+ENGINES = ('memory', 'indexed')
+FK_BACKENDS = ('hash', 'compact')
+
+# Decompressed bytes of the data file read by the structural pre-scan
+SAMPLE_BYTES = 1 << 22
+
+# Parsed JSON takes several times the size of its text in memory
+MEMORY_EXPANSION = 6
+
+# Share of the available memory a run may plan to use
+MEMORY_BUDGET = 0.5
+
+# Approximate memory per key of a KeyIndex (set entry plus boxed value) and of a CompactKeySet
+HASH_KEY_BYTES = 120
+COMPACT_KEY_BYTES = 40
+
+# Parsed tables the indexed engine keeps cached. Every phase works through the tables one
+# at a time and foreign key targets are read once into their key index, so a single
+# cached table bounds the parsed data in memory to about two tables
+INDEXED_CACHE_SIZE = 1
+
+# Foreign key target rows above which the compact key sets are used regardless of memory
+COMPACT_KEY_THRESHOLD = 5000000
+
+DECOMPRESSORS = {
+    'gzip': lambda: zlib.decompressobj(wbits=31),
+    'bz2': bz2.BZ2Decompressor,
+    'xz': lzma.LZMADecompressor
+}
+
+
+def available_memory():
+    """Memory available to new allocations in bytes, or None if it can't be determined"""
+    try:
+        with open('/proc/meminfo', 'r') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def available_cpus():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def read_sample(path, compression):
+    """Return (sample, estimated decompressed size) of a data file.
+
+    For compressed files the decompressed size is extrapolated from the compression
+    ratio of the sample.
+    """
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        if compression is None:
+            return f.read(SAMPLE_BYTES), size
+
+        decompressor = DECOMPRESSORS[compression]()
+        sample = b''
+        consumed = 0
+        while len(sample) < SAMPLE_BYTES:
+            block = f.read(1 << 16)
+            if not block:
+                break
+            consumed += len(block)
+            try:
+                sample += decompressor.decompress(block)
+            except (OSError, EOFError, zlib.error, lzma.LZMAError):
+                break
+            if getattr(decompressor, 'eof', False):
+                break
+    if not consumed or not sample:
+        return sample, size
+    return sample[:SAMPLE_BYTES], int(size * len(sample) / consumed)
+
+
+def count_rows(sample):
+    """Count the tables and row objects that start in a (possibly truncated) data file sample"""
+    tables = {}
+    depth = 0
+    expect_key = False
+    key = None
+    for match in TOKEN_PATTERN.finditer(sample):
+        token = match.group()
+        first = token[0]
+        if first == 0x22:  # "
+            if depth == 1:
+                if expect_key:
+                    key = token[1:-1].decode('utf-8', 'replace')
+                expect_key = not expect_key
+        elif first == 0x2c:  # ,
+            if depth == 1:
+                expect_key = True
+        elif first in (0x7b, 0x5b):  # { [
+            depth += 1
+            if depth == 1:
+                expect_key = True
+            elif depth == 2 and first == 0x5b:
+                tables.setdefault(key, 0)
+            elif depth == 3 and first == 0x7b and key in tables:
+                tables[key] += 1
+        else:  # } ]
+            depth -= 1
+    return tables
+
+
+class InputProfile:
+    """What the planner knows about a validation's input after a quick structural pre-scan.
+
+    Row counts are exact when the data file has an up-to-date index sidecar, otherwise
+    they are extrapolated from a sample of the start of the file.
+    """
+
+    def __init__(self, schema, data_path):
+        self.data_path = data_path
+        self.file_size = os.path.getsize(data_path)
+        self.compression = detect_compression(data_path)
+
+        index = DataFileIndex.load(data_path) if self.compression is None else None
+        self.indexed = index is not None
+        if index is not None:
+            self.text_size = self.file_size
+            self.table_rows = {name: index.row_count(name) for name in index.tables()}
+            self.exact = True
+        else:
+            sample, self.text_size = read_sample(data_path, self.compression)
+            sampled_rows = count_rows(sample)
+            scale = self.text_size / len(sample) if sample else 1
+            self.table_rows = {name: int(rows * scale) if len(sample) < self.text_size else rows
+                               for name, rows in sampled_rows.items()}
+            self.exact = len(sample) >= self.text_size
+
+        self.rows = sum(self.table_rows.values())
+        self.fk_targets = foreign_key_targets(schema)
+        self.fk_columns = sum(
+            1 for table in schema['tables'] for column in table['columns'] if column.get('relationship')
+        )
+        target_tables = {table for table, _ in self.fk_targets}
+        if self.exact or target_tables <= set(self.table_rows):
+            self.fk_target_rows = sum(self.table_rows.get(table, 0) for table in target_tables)
+        else:
+            # Tables past the sample could be targets, so assume the worst
+            self.fk_target_rows = self.rows * len(self.fk_targets)
+
+
+class EnginePlan:
+    """The engine, worker count and foreign key index backend chosen for a run, with the reasons"""
+
+    def __init__(self, profile, engine, workers, fk_backend, memory, cpus, reasons):
+        self.profile = profile
+        self.engine = engine
+        self.workers = workers
+        self.fk_backend = fk_backend
+        self.memory = memory
+        self.cpus = cpus
+        self.reasons = reasons
+
+    def describe(self):
+        profile = self.profile
+        estimate = 'exact' if profile.exact else 'estimated'
+        lines = [
+            f"Engine: {self.engine}, workers: {self.workers}, foreign key index: {self.fk_backend}",
+            f"Input: {format_size(profile.file_size)} on disk"
+            + (f" ({profile.compression}, ~{format_size(profile.text_size)} decompressed)" if profile.compression else '')
+            + f", {len(profile.table_rows)} tables, {profile.rows} rows ({estimate}),"
+            f" {profile.fk_columns} foreign key columns into {len(profile.fk_targets)} target columns",
+            f"Resources: {format_size(self.memory) if self.memory is not None else 'unknown'} available memory,"
+            f" {self.cpus} CPUs"
+        ]
+        lines.extend(f"- {reason}" for reason in self.reasons)
+        return lines
+
+
+def format_size(size):
+    for unit in ('B', 'KiB', 'MiB', 'GiB'):
+        if size < 1024:
+            return f'{size:.0f} {unit}'
+        size /= 1024
+    return f'{size:.1f} TiB'
+
+
+def plan_engine(schema, data_path, shards=1, memory=None, cpus=None):
+    """Pick the engine, worker count and foreign key index backend for validating data_path.
+
+    The in-memory engine parses the whole data file, the indexed engine parses it
+    table by table through its byte-offset index (uncompressed files only). Pass
+    shards for runs that validate several data files of the same size.
+    """
+    profile = InputProfile(schema, data_path)
+    if memory is None:
+        memory = available_memory()
+    if cpus is None:
+        cpus = available_cpus()
+    reasons = []
+
+    budget = memory * MEMORY_BUDGET if memory is not None else None
+    parsed_size = profile.text_size * MEMORY_EXPANSION
+    # The indexed engine holds the table being checked and at most one more (the cached
+    # table, or a foreign key target being indexed) parsed at a time
+    largest_share = max(profile.table_rows.values()) / profile.rows if profile.rows else 1
+    indexed_size = min(parsed_size, 2 * largest_share * parsed_size)
+
+    if budget is None:
+        engine = 'memory'
+        reasons.append('Available memory is unknown, parsing the data file in memory')
+    elif parsed_size <= budget:
+        engine = 'memory'
+        reasons.append(f'The parsed data (~{format_size(parsed_size)}) fits the memory budget '
+                       f'({format_size(budget)}), parsing it in memory')
+    elif profile.compression is not None:
+        engine = 'memory'
+        reasons.append(f'The parsed data (~{format_size(parsed_size)}) exceeds the memory budget '
+                       f'({format_size(budget)}), but {profile.compression} files can only be parsed as a whole')
+    else:
+        engine = 'indexed'
+        reasons.append(f'The parsed data (~{format_size(parsed_size)}) exceeds the memory budget '
+                       f'({format_size(budget)}), parsing it table by table through its byte-offset index '
+                       f'(~{format_size(indexed_size)} at a time)')
+        if indexed_size > budget:
+            reasons.append(f'The largest tables alone (~{format_size(indexed_size)}) still exceed the memory budget')
+
+    # Every worker holds its own parsed shard
+    resident_size = parsed_size if engine == 'memory' else indexed_size
+    workers = min(shards, cpus)
+    if budget is not None and workers > 1:
+        workers = max(1, min(workers, int(budget // max(resident_size, 1))))
+    if shards == 1:
+        reasons.append('A single data file is validated in one process')
+    else:
+        reasons.append(f'{workers} workers for {shards} shards on {cpus} CPUs')
+
+    hash_size = profile.fk_target_rows * HASH_KEY_BYTES
+    if profile.fk_target_rows > COMPACT_KEY_THRESHOLD:
+        fk_backend = 'compact'
+        reasons.append(f'{profile.fk_target_rows} foreign key target rows, using compact sorted key sets')
+    elif budget is not None and resident_size + hash_size > budget:
+        fk_backend = 'compact'
+        reasons.append(f'Hash indexes of the foreign key targets (~{format_size(hash_size)}) would exceed '
+                       f'the memory budget, using compact sorted key sets')
+    else:
+        fk_backend = 'hash'
+        reasons.append(f'Hash indexes of the foreign key targets (~{format_size(hash_size)}) fit in memory')
+
+    return EnginePlan(profile, engine, workers, fk_backend, memory, cpus, reasons)
+
+
+def load_data(data_path, engine='memory'):
+    """Load a data file for the given engine, falling back to parsing it whole.
+
+    The indexed engine re-parses a table each time a phase reaches it, trading
+    parsing time for only ever holding a table or two in memory.
+    """
+    if engine == 'indexed':
+        index = DataFileIndex.load_or_build(data_path)
+        if index is not None:
+            return IndexedData(index, INDEXED_CACHE_SIZE)
+    return load_json_file(data_path)
@@ -0,0 +1,85 @@
+import bz2
+import gzip
+import json
+import lzma
+import zlib
+
+
+# Magic bytes of the supported compression formats and how to open them
+COMPRESSION_FORMATS = [
+    ('gzip', b'\x1f\x8b', gzip.open),
+    ('bz2', b'BZh', bz2.open),
+    ('xz', b'\xfd7zXZ\x00', lzma.open),
+]
+
+ZIP_MAGIC = b'PK\x03\x04'
+
+MAGIC_LENGTH = max(len(magic) for _, magic, _ in COMPRESSION_FORMATS)
+
+
+def detect_compression(file):
+    """Return the compression format of a path or seekable binary file object, or None.
+
+    File objects are returned to the position they were at.
+    """
+    if isinstance(file, (str, bytes)) or hasattr(file, '__fspath__'):
+        with open(file, 'rb') as f:
+            header = f.read(MAGIC_LENGTH)
+    else:
+        position = file.tell()
+        header = file.read(MAGIC_LENGTH)
+        file.seek(position)
+
+    for name, magic, _ in COMPRESSION_FORMATS:
+        if header.startswith(magic):
+            return name
+    return None
+
+
+def is_zip_archive(file):
+    """Check whether a seekable binary file object holds a ZIP archive"""
+    position = file.tell()
+    header = file.read(len(ZIP_MAGIC))
+    file.seek(position)
+    return header == ZIP_MAGIC
+
+
+def open_binary(path):
+    """Open a file for reading, transparently decompressing it while it is read"""
+    compression = detect_compression(path)
+    for name, _, opener in COMPRESSION_FORMATS:
+        if name == compression:
+            return opener(path, 'rb')
+    return open(path, 'rb')
+
+
+def read_bytes(path):
+    """Read the (decompressed) content of a file"""
+    with open_binary(path) as f:
+        return f.read()
+
+
+def exceeds_size(path, max_bytes):
+    """Check whether the (decompressed) content of a file is larger than max_bytes.
+
+    At most max_bytes + 1 bytes are decompressed, a block at a time. Content that
+    can't be decompressed counts as not exceeding, reading it reports the error.
+    """
+    remaining = max_bytes + 1
+    try:
+        with open_binary(path) as f:
+            while remaining > 0:
+                block = f.read(min(remaining, 1 << 20))
+                if not block:
+                    return False
+                remaining -= len(block)
+    except (OSError, EOFError, zlib.error, lzma.LZMAError):
+        return False
+    return True
+
+
+def load_json_file(path):
+    """Parse a JSON file that may be gzip, bz2 or xz compressed"""
+    with open_binary(path) as f:
+        # json accepts bytes and detects their UTF-8/16/32 encoding itself
+        return json.load(f)
@@ -0,0 +1,232 @@
+import hashlib
+import json
+from array import array
+from bisect import bisect_left
+
+
+def canonical_key(value):
+    """Encode a key value so that values comparing equal in Python encode identically.
+
+    Booleans and integral floats are encoded as integers because True == 1 == 1.0.
+    """
+    if isinstance(value, bool):
+        value = int(value)
+    elif isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return json.dumps(value, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+
+def key_hash(encoded_key):
+    return int.from_bytes(hashlib.blake2b(encoded_key, digest_size=8).digest(), 'little')
+
+
+# Row positions kept per duplicated key for reporting
+DUPLICATE_SAMPLE_SIZE = 5
+
+
+class KeyIndex:
+    """In-memory hash index of the values of one column of a table.
+
+    Serves both foreign key lookups and uniqueness checks: it records the row
+    position each value was first seen at, and for values seen more than once
+    their count along with a capped sample of their row positions. Lookups follow
+    Python equality like a scan of the rows would. Unhashable values (lists,
+    objects) can't be hashed, so those are kept aside and compared one by one.
+    """
+
+    def __init__(self, sample_size=DUPLICATE_SAMPLE_SIZE):
+        self.sample_size = sample_size
+        self.positions = {}
+        self.duplicates = {}
+        self.unhashable = []
+
+    @classmethod
+    def from_rows(cls, rows, column, sample_size=DUPLICATE_SAMPLE_SIZE):
+        index = cls(sample_size)
+        for position, row in enumerate(rows):
+            if column not in row:
+                continue
+            index.add(row[column], position)
+        return index
+
+    def add(self, value, position=None):
+        try:
+            if value not in self.positions:
+                self.positions[value] = position
+                return
+        except TypeError:
+            self.unhashable.append((value, position))
+            return
+        duplicate = self.duplicates.get(value)
+        if duplicate is None:
+            self.duplicates[value] = duplicate = [1, [self.positions[value]]]
+        duplicate[0] += 1
+        if len(duplicate[1]) < self.sample_size:
+            duplicate[1].append(position)
+
+    def __contains__(self, value):
+        try:
+            return value in self.positions
+        except TypeError:
+            return any(value == key for key, _ in self.unhashable)
+
+    def duplicate_values(self):
+        """Return (value, count, sample positions) of each non-null value seen more than once.
+
+        Values are returned in the order they were first seen. Unhashable values are
+        grouped by their canonical encoding.
+        """
+        duplicates = [
+            (value, count, positions) for value, (count, positions) in self.duplicates.items()
+            if value is not None
+        ]
+
+        groups = {}
+        for value, position in self.unhashable:
+            groups.setdefault(canonical_key(value), []).append((value, position))
+        for group in groups.values():
+            if len(group) > 1:
+                duplicates.append((group[0][0], len(group), [position for _, position in group[:self.sample_size]]))
+
+        duplicates.sort(key=lambda duplicate: duplicate[2][0])
+        return duplicates
+
+
+def build_compact_key_buffers(values):
+    """Build the buffers of a CompactKeySet holding the given values.
+
+    Returns (hashes, offsets, keys): the sorted 64 bit hashes of the distinct encoded
+    keys, the offsets of each encoded key in keys (one more than there are hashes)
+    and the concatenated encoded keys in hash order.
+    """
+    return pack_key_entries({(key_hash(encoded), encoded) for encoded in map(canonical_key, values)})
+
+
+def merge_compact_key_buffers(buffer_sets):
+    """Build the buffers of a CompactKeySet holding the keys of all of the given buffer sets"""
+    entries = set()
+    for hashes, offsets, keys in buffer_sets:
+        key_set = CompactKeySet(hashes, offsets, keys)
+        entries.update(
+            (key_set.hashes[position], bytes(key_set.keys[key_set.offsets[position]:key_set.offsets[position + 1]]))
+            for position in range(len(key_set))
+        )
+    return pack_key_entries(entries)
+
+
+def pack_key_entries(entries):
+    entries = sorted(entries)
+    hashes = array('Q', (entry[0] for entry in entries))
+    offsets = array('Q', [0])
+    keys = bytearray()
+    for _, encoded in entries:
+        keys += encoded
+        offsets.append(len(keys))
+    return hashes.tobytes(), offsets.tobytes(), bytes(keys)
+
+
+# Bloom filter bits per key, about a 1% false positive rate with BLOOM_HASHES probes
+BLOOM_BITS_PER_KEY = 10
+BLOOM_HASHES = 7
+
+
+def bloom_probes(hash_value, size):
+    """Bit positions of a key hash in a Bloom filter of size bits (double hashing)"""
+    first = hash_value & 0xffffffff
+    step = (hash_value >> 32) | 1
+    return [(first + probe * step) % size for probe in range(BLOOM_HASHES)]
+
+
+def build_bloom_buffer(hashes, bits_per_key=BLOOM_BITS_PER_KEY):
+    """Build the bit array of a Bloom filter over the key hashes of a CompactKeySet"""
+    hashes = memoryview(hashes).cast('B').cast('Q') if len(hashes) else ()
+    bits = bytearray((max(len(hashes) * bits_per_key, 64) + 7) // 8)
+    size = len(bits) * 8
+    for hash_value in hashes:
+        for position in bloom_probes(hash_value, size):
+            bits[position >> 3] |= 1 << (position & 7)
+    return bytes(bits)
+
+
+class CompactKeySet:
+    """Read-only key set over flat buffers, e.g. memory-mapped files or shared memory.
+
+    A lookup binary searches the sorted hash array and then compares the encoded
+    keys of the matching hashes, so a hash collision never reports a missing key
+    as present. An optional Bloom filter over the hashes rejects most missing keys
+    before the search; its false positives are settled by the exact comparison.
+    """
+
+    def __init__(self, hashes, offsets, keys, owners=(), bloom=None):
+        self.hashes = memoryview(hashes).cast('B').cast('Q') if len(hashes) else array('Q')
+        self.offsets = memoryview(offsets).cast('B').cast('Q') if len(offsets) else array('Q', [0])
+        self.keys = memoryview(keys) if len(keys) else memoryview(b'')
+        self.bloom = memoryview(bloom).cast('B') if bloom is not None and len(bloom) else None
+        # Keep the objects backing the buffers (mmaps, shared memory) alive
+        self.owners = owners
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def __contains__(self, value):
+        try:
+            encoded = canonical_key(value)
+        except (TypeError, ValueError):
+            return False
+        target = key_hash(encoded)
+        if self.bloom is not None:
+            size = len(self.bloom) * 8
+            for position in bloom_probes(target, size):
+                if not self.bloom[position >> 3] & (1 << (position & 7)):
+                    return False
+        position = bisect_left(self.hashes, target)
+        while position < len(self.hashes) and self.hashes[position] == target:
+            if self.keys[self.offsets[position]:self.offsets[position + 1]] == encoded:
+                return True
+            position += 1
+        return False
+
+
+class KeyIndexRegistry:
+    """Column key indexes by (table, column), built from the data on first use.
+
+    The same index serves the foreign key lookups into a column and its uniqueness
+    check, so the column is only indexed once. With the 'compact' backend, columns
+    that are only used for lookups are indexed into a CompactKeySet instead, which
+    takes a fraction of the memory of a KeyIndex.
+
+    Lookups into the shared key sets (e.g. the global index of a sharded dataset)
+    take precedence over the data. Targets whose table is in neither are resolved
+    from the external key sets (e.g. registered reference datasets) when there is
+    one for them.
+    """
+
+    def __init__(self, external=None, backend='hash', shared=None):
+        self.indexes = {}
+        self.external = external or {}
+        self.backend = backend
+        self.shared = shared or {}
+
+    def get(self, data, table, column, duplicates=False):
+        """Return the key set of table.column, or None if the table can't be resolved.
+
+        duplicates asks for a KeyIndex of the data, which also tracks the duplicated values.
+        """
+        if not duplicates and (table, column) in self.shared:
+            return self.shared[(table, column)]
+        index = self.indexes.get((table, column))
+        if index is None or (duplicates and not isinstance(index, KeyIndex)):
+            if table in data:
+                if self.backend == 'compact' and not duplicates:
+                    values = [row[column] for row in data[table] if column in row]
+                    index = CompactKeySet(*build_compact_key_buffers(values))
+                else:
+                    index = KeyIndex.from_rows(data[table], column)
+            else:
+                index = self.external.get((table, column))
+            self.indexes[(table, column)] = index
+        return index
+
+    def is_external(self, data, table, column):
+        """Whether lookups into table.column are resolved from the external key sets"""
+        return (table, column) not in self.shared and table not in data
@@ -1,4 +1,20 @@
 import logging
+from collections import Counter
+
+
+# Logger of a run's diagnostics (engine plan, cache statistics, shard summaries), which are
+# kept apart from the findings and only shown once enable_diagnostics is called
+DIAGNOSTICS_LOGGER = 'valigator.diagnostics'
+
+
+def enable_diagnostics(level=logging.INFO):
+    """Print the diagnostics logged from now on to stderr"""
+    diagnostics = logging.getLogger(DIAGNOSTICS_LOGGER)
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    diagnostics.addHandler(handler)
+    diagnostics.setLevel(level)
+    diagnostics.propagate = False
 
 
 class SchemaValidatorLogger:
@@ -7,9 +23,18 @@ class SchemaValidatorLogger:
         self.warnings = []
         self.errors = []
         self.structural_errors = []
+        # Validation phase the messages being added belong to
+        self.phase = None
+        # (message_type, message) -> Counter of the (table, column, phase) the message was reported for
+        self.locations = {}
         self.logger = logging.getLogger(__name__)
         
-    def add_message(self, message, message_type):
+    def add_message(self, message, message_type, table=None, column=None):
+        if table is not None or column is not None:
+            locations = self.locations.get((message_type, message))
+            if locations is None:
+                locations = self.locations[(message_type, message)] = Counter()
+            locations[(table, column, self.phase)] += 1
         if message_type == 'info':
             self.info.append(message)
         elif message_type == 'warning':
@@ -0,0 +1,145 @@
+import json
+import logging
+import mmap
+import os
+
+from utils.data_index import file_sha256
+from utils.file_loader import load_json_file
+from utils.key_index import CompactKeySet, build_compact_key_buffers
+from utils.logger import DIAGNOSTICS_LOGGER
+
+
+DEFAULT_REFERENCE_DIR = os.path.join('.valigator', 'references')
+STORE_VERSION = 1
+
+KEY_SET_FILES = ('hashes', 'offsets', 'keys')
+
+
+def foreign_key_targets(schema):
+    """The (table, column) names referenced by the relationships of a schema"""
+    tables = {table['uuid']: table for table in schema['tables']}
+    targets = set()
+    for table in schema['tables']:
+        for column in table['columns']:
+            for relationship in column.get('relationship') or []:
+                target_table = tables.get(relationship['table_uuid'])
+                if target_table is None:
+                    continue
+                for target_column in target_table['columns']:
+                    if target_column['uuid'] == relationship['column_uuid']:
+                        targets.add((target_table['name'], target_column['name']))
+    return targets
+
+
+def map_file(path):
+    """Memory-map a file read-only, an empty file maps to empty bytes"""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b''
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class ReferenceStore:
+    """On-disk key sets of shared reference datasets, used to resolve foreign keys into them.
+
+    Each registered dataset is indexed once into directory/<sha256 of the file>/,
+    one CompactKeySet (hashes, offsets and keys files) per foreign key target
+    column, and later opened with mmap. registry.json remembers the hash of each
+    registered path along with its size and modification time, so unchanged
+    datasets are neither re-read nor re-hashed.
+    """
+
+    def __init__(self, directory=DEFAULT_REFERENCE_DIR):
+        self.directory = directory
+        self.registry_path = os.path.join(directory, 'registry.json')
+        self.logger = logging.getLogger(DIAGNOSTICS_LOGGER)
+
+    def load_registry(self):
+        try:
+            with open(self.registry_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_json(self, path, content):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(f'{path}.tmp', 'w') as f:
+            json.dump(content, f)
+        os.replace(f'{path}.tmp', path)
+
+    def digest(self, path):
+        """Content hash of a reference dataset, reusing the registered one while the file is unchanged"""
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        entry = self.load_registry().get(path)
+        if entry and (entry['size'], entry['mtime_ns']) == (stat.st_size, stat.st_mtime_ns):
+            return entry['sha256']
+
+        digest = file_sha256(path)
+        registry = self.load_registry()
+        registry[path] = {'sha256': digest, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+        self.save_json(self.registry_path, registry)
+        return digest
+
+    def manifest_path(self, digest):
+        return os.path.join(self.directory, digest, 'manifest.json')
+
+    def load_manifest(self, digest):
+        try:
+            with open(self.manifest_path(digest), 'r') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return {'version': STORE_VERSION, 'tables': {}, 'key_sets': [], 'absent': []}
+        if manifest.get('version') != STORE_VERSION:
+            return {'version': STORE_VERSION, 'tables': {}, 'key_sets': [], 'absent': []}
+        return manifest
+
+    def register(self, path, targets):
+        """Index the target (table, column) pairs of a reference dataset that aren't indexed yet.
+
+        Returns the content hash the dataset is stored under.
+        """
+        digest = self.digest(path)
+        manifest = self.load_manifest(digest)
+        indexed = {(table, column) for table, columns in manifest['tables'].items() for column in columns}
+        indexed.update((table, column) for table, column in manifest['absent'])
+        missing = set(targets) - indexed
+        if not missing:
+            return digest
+
+        self.logger.info(f'Indexing reference dataset {path} ({digest[:12]})')
+        data = load_json_file(path)
+        if not isinstance(data, dict):
+            raise ValueError(f"Reference dataset '{path}' must be a dictionary of tables")
+
+        os.makedirs(os.path.join(self.directory, digest), exist_ok=True)
+        for table, column in sorted(missing):
+            rows = data.get(table)
+            if not isinstance(rows, list):
+                # Remember that the dataset lacks the table so it isn't read again for it
+                manifest['absent'].append([table, column])
+                continue
+            values = [row[column] for row in rows if isinstance(row, dict) and row.get(column) is not None]
+            number = len(manifest['key_sets'])
+            for name, buffer in zip(KEY_SET_FILES, build_compact_key_buffers(values)):
+                with open(os.path.join(self.directory, digest, f'{number}.{name}'), 'wb') as f:
+                    f.write(buffer)
+            manifest['key_sets'].append([table, column])
+            manifest['tables'].setdefault(table, {})[column] = number
+
+        self.save_json(self.manifest_path(digest), manifest)
+        return digest
+
+    def open(self, path, targets):
+        """Return the memory-mapped key sets of a reference dataset by (table, column).
+
+        Targets that haven't been indexed yet are indexed first.
+        """
+        digest = self.register(path, targets)
+        manifest = self.load_manifest(digest)
+        key_sets = {}
+        for table, columns in manifest['tables'].items():
+            for column, number in columns.items():
+                buffers = [map_file(os.path.join(self.directory, digest, f'{number}.{name}')) for name in KEY_SET_FILES]
+                key_sets[(table, column)] = CompactKeySet(*buffers, owners=tuple(buffers))
+        return key_sets
@@ -0,0 +1,77 @@
+from collections import Counter
+
+
+# Report severities mapped to the logger attribute holding their messages
+SEVERITIES = {
+    'structural_errors': 'structural_error',
+    'errors': 'error',
+    'warnings': 'warning',
+    'info': 'info'
+}
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+class ValidationReport:
+    """Server-side view of a finished validation that groups identical messages.
+
+    Groups are kept in the order their message was first reported and can be
+    retrieved page by page, filtered by table, column or message text.
+    """
+
+    def __init__(self, logger):
+        self.groups = {}
+        for severity, message_type in SEVERITIES.items():
+            groups = []
+            for message, count in Counter(getattr(logger, severity)).items():
+                locations = logger.locations.get((message_type, message), {})
+                groups.append({
+                    'message': message,
+                    'count': count,
+                    'tables': sorted({table for table, _, _ in locations if table is not None}),
+                    'columns': sorted({column for _, column, _ in locations if column is not None})
+                })
+            self.groups[severity] = groups
+
+    def summary(self):
+        """Number of distinct messages per severity"""
+        return {severity: len(groups) for severity, groups in self.groups.items()}
+
+    def tables(self):
+        """All tables findings were reported for, for filter choices"""
+        return sorted({table for groups in self.groups.values() for group in groups for table in group['tables']})
+
+    def filter(self, severity, table=None, column=None, text=None):
+        """Return the groups of a severity that match all of the given filters"""
+        text = text.lower() if text else None
+        matches = []
+        for group in self.groups[severity]:
+            if table and table not in group['tables']:
+                continue
+            if column and column not in group['columns']:
+                continue
+            if text and text not in group['message'].lower():
+                continue
+            matches.append(group)
+        return matches
+
+    def page(self, severity, page=1, per_page=DEFAULT_PAGE_SIZE, table=None, column=None, text=None):
+        """Return one page of the groups of a severity along with the filtered counts"""
+        if severity not in self.groups:
+            raise ValueError(f"Invalid severity '{severity}'. Must be one of {', '.join(SEVERITIES)}")
+        page = max(page, 1)
+        per_page = min(max(per_page, 1), MAX_PAGE_SIZE)
+
+        counts = {name: len(self.filter(name, table, column, text)) for name in self.groups}
+        matches = self.filter(severity, table, column, text)
+        start = (page - 1) * per_page
+        return {
+            'severity': severity,
+            'page': page,
+            'per_page': per_page,
+            'total': len(matches),
+            'has_more': start + per_page < len(matches),
+            'counts': counts,
+            'items': matches[start:start + per_page]
+        }
@@ -0,0 +1,211 @@
+import json
+import os
+
+from utils.checkpoint import file_fingerprint
+
+
+STATE_VERSION = 2
+
+
+class SchemaDelta:
+    """The checks of a validation that are affected by moving from one schema version to another.
+
+    Findings are located by (phase, table, column). table_names tells whether the
+    table name check has to be re-run, tables holds the tables whose column name
+    check is affected, and values and foreign_keys hold the (table, column) pairs
+    whose value checks or foreign key checks are affected. Tables and columns are
+    matched between the versions by UUID, and renamed ones are affected under both
+    their old and their new name.
+    """
+
+    def __init__(self):
+        self.table_names = False
+        self.tables = set()
+        self.values = set()
+        self.foreign_keys = set()
+        self.changes = []
+
+    def affects(self, phase, table, column):
+        if phase == 'table_names':
+            return self.table_names
+        if phase == 'column_names':
+            return table in self.tables
+        if phase == 'column_values':
+            return (table, column) in self.values
+        if phase == 'foreign_keys':
+            return (table, column) in self.foreign_keys
+        # Findings that aren't attributed to a phase can't be carried over safely
+        return True
+
+    def is_empty(self):
+        return not (self.table_names or self.tables or self.values or self.foreign_keys)
+
+    def affect_column(self, table, column):
+        self.values.add((table, column))
+        self.foreign_keys.add((table, column))
+
+    def affect_table(self, table, columns):
+        self.tables.add(table)
+        for column in columns:
+            self.affect_column(table, column)
+
+    def affect_relationships(self, schema):
+        """Affect the foreign key checks of every column of schema that has a relationship"""
+        for table in schema['tables']:
+            for column in table['columns']:
+                if column.get('relationship'):
+                    self.foreign_keys.add((table['name'], column['name']))
+
+
+def relationship_targets(schema, column):
+    """Names of the (table, column) pairs a column references, None where a UUID doesn't resolve"""
+    tables = {table['uuid']: table for table in schema['tables']}
+    targets = []
+    for relationship in column.get('relationship') or []:
+        table = tables.get(relationship['table_uuid'])
+        if table is None:
+            targets.append(None)
+            continue
+        target_column = next((col for col in table['columns'] if col['uuid'] == relationship['column_uuid']), None)
+        targets.append((table['name'], target_column['name'] if target_column else None))
+    return targets
+
+
+def diff_schemas(old_schema, new_schema):
+    """Compare two schema versions by table and column UUID and return their SchemaDelta"""
+    delta = SchemaDelta()
+
+    old_type_names = {column_type['uuid']: column_type['name'] for column_type in old_schema['column_types']}
+    new_type_names = {column_type['uuid']: column_type['name'] for column_type in new_schema['column_types']}
+
+    old_tables = {table['uuid']: table for table in old_schema['tables']}
+    new_tables = {table['uuid']: table for table in new_schema['tables']}
+
+    if [table['name'] for table in old_schema['tables']] != [table['name'] for table in new_schema['tables']]:
+        delta.table_names = True
+        delta.changes.append('Table names changed')
+
+    for table_uuid in list(old_tables) + [uuid for uuid in new_tables if uuid not in old_tables]:
+        old_table = old_tables.get(table_uuid)
+        new_table = new_tables.get(table_uuid)
+
+        if new_table is None:
+            delta.affect_table(old_table['name'], [col['name'] for col in old_table['columns']])
+            delta.changes.append(f"Table '{old_table['name']}' removed")
+            continue
+        if old_table is None:
+            delta.affect_table(new_table['name'], [col['name'] for col in new_table['columns']])
+            delta.changes.append(f"Table '{new_table['name']}' added")
+            continue
+        if old_table['name'] != new_table['name']:
+            delta.affect_table(old_table['name'], [col['name'] for col in old_table['columns']])
+            delta.affect_table(new_table['name'], [col['name'] for col in new_table['columns']])
+            delta.changes.append(f"Table '{old_table['name']}' renamed to '{new_table['name']}'")
+            continue
+
+        table_name = new_table['name']
+        if [col['name'] for col in old_table['columns']] != [col['name'] for col in new_table['columns']]:
+            delta.tables.add(table_name)
+            delta.changes.append(f"Columns of table '{table_name}' changed")
+
+        old_columns = {col['uuid']: col for col in old_table['columns']}
+        new_columns = {col['uuid']: col for col in new_table['columns']}
+
+        for column_uuid in list(old_columns) + [uuid for uuid in new_columns if uuid not in old_columns]:
+            old_column = old_columns.get(column_uuid)
+            new_column = new_columns.get(column_uuid)
+
+            if new_column is None:
+                delta.affect_column(table_name, old_column['name'])
+                delta.changes.append(f"Column '{table_name}.{old_column['name']}' removed")
+                continue
+            if old_column is None:
+                delta.affect_column(table_name, new_column['name'])
+                delta.changes.append(f"Column '{table_name}.{new_column['name']}' added")
+                continue
+            if old_column['name'] != new_column['name']:
+                delta.affect_column(table_name, old_column['name'])
+                delta.affect_column(table_name, new_column['name'])
+                delta.changes.append(f"Column '{table_name}.{old_column['name']}' renamed to '{new_column['name']}'")
+                continue
+
+            column_name = new_column['name']
+            if old_type_names.get(old_column['type']) != new_type_names.get(new_column['type']):
+                delta.values.add((table_name, column_name))
+                delta.changes.append(f"Type of column '{table_name}.{column_name}' changed")
+            if old_column.get('properties') != new_column.get('properties'):
+                delta.values.add((table_name, column_name))
+                delta.changes.append(f"Properties of column '{table_name}.{column_name}' changed")
+            # Foreign key findings name the referenced table and column, so renaming them matters too
+            if relationship_targets(old_schema, old_column) != relationship_targets(new_schema, new_column):
+                delta.foreign_keys.add((table_name, column_name))
+                delta.changes.append(f"Relationships of column '{table_name}.{column_name}' changed")
+
+    return delta
+
+
+def prune_schema(schema, delta, phase):
+    """Copy of schema reduced to the columns whose phase checks are affected by delta.
+
+    Every table is kept so that relationships still resolve, but columns that
+    aren't affected lose their relationship (foreign_keys) or are dropped
+    (column_values).
+    """
+    affected = delta.foreign_keys if phase == 'foreign_keys' else delta.values
+    tables = []
+    for table in schema['tables']:
+        columns = []
+        for column in table['columns']:
+            if (table['name'], column['name']) in affected:
+                columns.append(column)
+            elif phase == 'foreign_keys':
+                columns.append(dict(column, relationship=None))
+        tables.append(dict(table, columns=columns))
+    return dict(schema, tables=tables)
+
+
+def diff_references(old_references, new_references, old_schema, new_schema, delta):
+    """Affect every foreign key check of delta if the reference datasets (by content hash) changed.
+
+    Any foreign key can resolve against a reference dataset, so the checks of
+    columns with a relationship in either schema version are affected.
+    """
+    if sorted(old_references) == sorted(new_references):
+        return
+    delta.affect_relationships(old_schema)
+    delta.affect_relationships(new_schema)
+    delta.changes.append('Reference datasets changed')
+
+
+def save_validation_state(path, schema, data_file, logger, references=()):
+    """Save the findings of a finished run along with the schema and reference datasets it ran against.
+
+    references are the content hashes of the reference datasets foreign keys
+    were resolved against.
+    """
+    state = {
+        'version': STATE_VERSION,
+        'schema': schema,
+        'data_file': file_fingerprint(data_file),
+        'references': sorted(references),
+        'findings': [
+            [message_type, message, table, column, phase, count]
+            for (message_type, message), locations in logger.locations.items()
+            for (table, column, phase), count in locations.items()
+        ]
+    }
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+def load_validation_state(path, data_file):
+    """Load a saved validation state, checking that it was made for data_file"""
+    with open(path, 'r') as f:
+        state = json.load(f)
+    if state.get('version') != STATE_VERSION:
+        raise ValueError(f"Unsupported validation state version in '{path}'")
+    if state['data_file'][1:] != file_fingerprint(data_file)[1:]:
+        raise ValueError(f"Validation state '{path}' was saved for a different version of the data file")
+    return state
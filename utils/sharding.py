@@ -0,0 +1,137 @@
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+from utils.data_index import DataFileIndex, IndexedData
+from utils.engine import INDEXED_CACHE_SIZE, load_data
+from utils.file_loader import load_json_file
+from utils.key_index import KeyIndexRegistry, build_compact_key_buffers, merge_compact_key_buffers
+from utils.logger import SchemaValidatorLogger
+from utils.reference_store import DEFAULT_REFERENCE_DIR, ReferenceStore, foreign_key_targets
+from utils.shared_keys import SharedKeySets, attach_key_sets
+
+
+# State of a shard validation worker process, set up once by init_worker
+worker_state = {}
+
+
+def shard_key_buffers(path, targets):
+    """Collect the foreign key target keys of one shard as CompactKeySet buffers by (table, column).
+
+    Only the target tables are parsed when the shard can be indexed, which leaves
+    its .idx sidecar next to the shard. Shards that can't be read contribute no
+    keys, their errors are reported when they are validated.
+    """
+    try:
+        index = DataFileIndex.load_or_build(path)
+    except Exception:
+        return {}
+    try:
+        try:
+            data = IndexedData(index, INDEXED_CACHE_SIZE) if index is not None else load_json_file(path)
+        except Exception:
+            return {}
+        if not isinstance(data, Mapping):
+            return {}
+
+        buffers = {}
+        for table, column in targets:
+            rows = data[table] if table in data else None
+            if not isinstance(rows, list):
+                continue
+            values = [row[column] for row in rows if isinstance(row, dict) and row.get(column) is not None]
+            buffers[(table, column)] = build_compact_key_buffers(values)
+        return buffers
+    finally:
+        # Workers are reused across shards, don't keep a file and mapping open per shard
+        if index is not None:
+            index.close()
+
+
+def build_global_key_buffers(schema, shard_files, workers=None):
+    """Build the global foreign key index of a sharded dataset in one pass over its shards.
+
+    Returns the CompactKeySet buffers of every target (table, column) that is in at
+    least one shard.
+    """
+    targets = sorted(foreign_key_targets(schema))
+    shard_buffers = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for buffers in executor.map(shard_key_buffers, shard_files, repeat(targets)):
+            for target, key_buffers in buffers.items():
+                shard_buffers.setdefault(target, []).append(key_buffers)
+    return {target: merge_compact_key_buffers(buffer_sets) for target, buffer_sets in shard_buffers.items()}
+
+
+def init_worker(schema, key_set_descriptors, backend='hash', references=(), reference_dir=DEFAULT_REFERENCE_DIR):
+    worker_state['schema'] = schema
+    worker_state['backend'] = backend
+    # Probe the global key sets in the shared memory they were published in
+    worker_state['shared'] = attach_key_sets(key_set_descriptors)
+    external = {}
+    if references:
+        reference_store = ReferenceStore(reference_dir)
+        for reference_file in references:
+            external.update(reference_store.open(reference_file, foreign_key_targets(schema)))
+    worker_state['external'] = external
+
+
+def validate_shard(path, engine='memory'):
+    """Validate one shard in a worker against the global index, returning the report as a dictionary"""
+    from main import validate_data, run_validation
+
+    logger = SchemaValidatorLogger()
+
+    def report(status):
+        return {
+            'status': status,
+            'info': logger.info,
+            'warnings': logger.warnings,
+            'errors': logger.errors,
+            'structural_errors': logger.structural_errors
+        }
+
+    try:
+        data = load_data(path, engine)
+    except Exception as e:
+        logger.add_message(f"Error reading data file: {e}", 'error')
+        return report('failed')
+
+    try:
+        try:
+            validate_data(data, logger)
+        except ValueError as e:
+            logger.add_message(f"Data validation error: {e}", 'error')
+            return report('failed')
+
+        key_indexes = KeyIndexRegistry(worker_state['external'], worker_state['backend'], worker_state['shared'])
+        run_validation(data, worker_state['schema'], logger, key_indexes=key_indexes)
+        return report('ok')
+    finally:
+        if isinstance(data, IndexedData):
+            data.index.close()
+
+
+def validate_shards(schema, shard_files, workers=None, engine='memory', backend='hash',
+                    references=(), reference_dir=DEFAULT_REFERENCE_DIR, bloom_bits_per_key=0):
+    """Validate the shards of a dataset in parallel with foreign keys resolved across all shards.
+
+    The global key sets are published once in shared memory, with a Bloom filter
+    prefilter of bloom_bits_per_key bits per key if it is not 0. The schema must
+    already be structurally valid. Returns the report of each shard in the order
+    of shard_files.
+    """
+    # Index the reference datasets up front rather than racing to do it in every worker
+    if references:
+        reference_store = ReferenceStore(reference_dir)
+        for reference_file in references:
+            reference_store.register(reference_file, foreign_key_targets(schema))
+
+    global_key_buffers = build_global_key_buffers(schema, shard_files, workers)
+
+    with SharedKeySets(global_key_buffers, bloom_bits_per_key) as shared_key_sets:
+        # The workers probe the published copy
+        del global_key_buffers
+        initargs = (schema, shared_key_sets.descriptors, backend, tuple(references), reference_dir)
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=initargs) as executor:
+            return list(executor.map(validate_shard, shard_files, repeat(engine)))
@@ -0,0 +1,63 @@
+from multiprocessing import shared_memory
+
+from utils.key_index import CompactKeySet, build_bloom_buffer
+
+
+class SharedKeySets:
+    """CompactKeySet buffers published once in shared memory for worker processes to probe.
+
+    Each key set is copied into one shared memory segment holding its hashes,
+    offsets, keys and (optionally) Bloom filter back to back. Workers attach to the
+    segments by the small picklable descriptors and look keys up in place, so the
+    key sets are neither pickled nor copied per worker. The publisher owns the
+    segments and unlinks them on close.
+    """
+
+    def __init__(self, key_buffers, bloom_bits_per_key=0):
+        self.segments = []
+        self.descriptors = {}
+        try:
+            for target, buffers in key_buffers.items():
+                if bloom_bits_per_key:
+                    buffers = tuple(buffers) + (build_bloom_buffer(buffers[0], bloom_bits_per_key),)
+                sizes = [len(buffer) for buffer in buffers]
+                # Shared memory can't be empty
+                segment = shared_memory.SharedMemory(create=True, size=max(sum(sizes), 1))
+                self.segments.append(segment)
+                position = 0
+                for buffer in buffers:
+                    segment.buf[position:position + len(buffer)] = buffer
+                    position += len(buffer)
+                self.descriptors[target] = (segment.name, sizes)
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self):
+        for segment in self.segments:
+            segment.close()
+            segment.unlink()
+        self.segments = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def attach_key_sets(descriptors):
+    """Return the CompactKeySets published under the given descriptors, by target"""
+    key_sets = {}
+    for target, (name, sizes) in descriptors.items():
+        segment = shared_memory.SharedMemory(name=name)
+        buffers = []
+        position = 0
+        # The hashes and offsets come first, so the 64 bit arrays stay aligned
+        for size in sizes:
+            buffers.append(segment.buf[position:position + size])
+            position += size
+        hashes, offsets, keys = buffers[:3]
+        bloom = buffers[3] if len(buffers) > 3 else None
+        key_sets[target] = CompactKeySet(hashes, offsets, keys, owners=(segment,), bloom=bloom)
+    return key_sets
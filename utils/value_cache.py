@@ -0,0 +1,131 @@
+import logging
+
+from utils.logger import DIAGNOSTICS_LOGGER
+
+
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_WARMUP_LOOKUPS = 4096
+DEFAULT_MIN_HIT_RATE = 0.5
+
+# Returned by ValueCache.get when there is nothing cached for a value
+MISS = object()
+
+
+class FindingRecorder:
+    """Logger stand-in that records messages so they can be cached and replayed"""
+
+    def __init__(self):
+        self.findings = []
+
+    def add_message(self, message, message_type):
+        self.findings.append((message, message_type))
+
+
+class ValueCache:
+    """Bounded cache of check findings for the values of a single column.
+
+    The cache turns itself off once it has seen more distinct values than
+    max_entries, or when the hit rate after the warm-up is below min_hit_rate,
+    so high-cardinality columns don't pay for bookkeeping they never profit from.
+    """
+
+    def __init__(self, name, max_entries=DEFAULT_MAX_ENTRIES, warmup_lookups=DEFAULT_WARMUP_LOOKUPS,
+                 min_hit_rate=DEFAULT_MIN_HIT_RATE):
+        self.name = name
+        self.max_entries = max_entries
+        self.warmup_lookups = warmup_lookups
+        self.min_hit_rate = min_hit_rate
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self.enabled = True
+        self.disabled_reason = None
+
+    @staticmethod
+    def key(value):
+        """Return the cache key for a value, or None if the value can't be cached"""
+        # The type is part of the key so that True, 1 and 1.0 are kept apart
+        key = (type(value), value)
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    def get(self, key):
+        if not self.enabled or key is None:
+            return MISS
+        findings = self.entries.get(key, MISS)
+        if findings is MISS:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return findings
+
+    def put(self, key, findings):
+        if not self.enabled or key is None:
+            return
+        lookups = self.hits + self.misses
+        if len(self.entries) >= self.max_entries:
+            self.disable('high cardinality')
+            return
+        if lookups >= self.warmup_lookups and self.hit_rate() < self.min_hit_rate:
+            self.disable('low hit rate')
+            return
+        self.entries[key] = findings
+
+    def disable(self, reason):
+        self.enabled = False
+        self.disabled_reason = reason
+        self.entries.clear()
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class ColumnValueCaches:
+    """One ValueCache per (check, table, column)"""
+
+    def __init__(self, **cache_options):
+        self.cache_options = cache_options
+        self.caches = {}
+        self.logger = logging.getLogger(DIAGNOSTICS_LOGGER)
+
+    def get(self, check, table, column):
+        cache_key = (check, table, column)
+        cache = self.caches.get(cache_key)
+        if cache is None:
+            cache = ValueCache(f'{check} {table}.{column}', **self.cache_options)
+            self.caches[cache_key] = cache
+        return cache
+
+    def report(self):
+        """Log the hit rate of every cache (debug) and a summary of all of them"""
+        if not self.caches:
+            return
+        for cache in self.caches.values():
+            state = 'enabled' if cache.enabled else f'disabled ({cache.disabled_reason})'
+            self.logger.debug(f'Value cache {cache.name}: {cache.hits} hits, {cache.misses} misses, '
+                              f'{cache.hit_rate():.1%} hit rate, {state}')
+
+        hits = sum(cache.hits for cache in self.caches.values())
+        lookups = hits + sum(cache.misses for cache in self.caches.values())
+        disabled = sum(1 for cache in self.caches.values() if not cache.enabled)
+        self.logger.info(f'Value caches: {len(self.caches)} columns, {hits} hits in {lookups} lookups '
+                         f'({hits / lookups if lookups else 0.0:.1%}), {disabled} disabled')
+
+
+def cached_findings(cache, value, compute):
+    """Return the findings for value from cache, computing and storing them on a miss.
+
+    compute receives a FindingRecorder and must report its findings to it.
+    """
+    key = cache.key(value)
+    findings = cache.get(key)
+    if findings is MISS:
+        recorder = FindingRecorder()
+        compute(recorder)
+        findings = recorder.findings
+        cache.put(key, findings)
+    return findings
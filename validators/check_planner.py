@@ -0,0 +1,109 @@
+# validators/check_planner.py
+
+from utils.value_cache import FindingRecorder
+from validators.type_validators import column_type_validator
+from validators.property_validators import PROPERTY_VALIDATORS, property_failure_message
+
+
+RANGE_PROPERTIES = ('no-less-than-prop', 'no-greater-than-prop')
+VALUE_PROPERTIES = ('regex-prop',) + RANGE_PROPERTIES
+
+# Checks whose failure can imply the outcome of others
+IMPLYING_KINDS = ('type', 'nullable-prop')
+
+
+class ColumnCheck:
+    """A single check on the values of a column"""
+
+    def __init__(self, kind, name, position, run):
+        self.kind = kind
+        self.name = name
+        self.position = position
+        self.run = run
+
+
+class ColumnPlan:
+    """Orders the type and property checks of one column and skips checks whose outcome is implied.
+
+    A failed nullable check implies that the value checks (regex and ranges) fail
+    on the null value, and a failed numeric type conversion implies that the range
+    checks can't parse the value either. Implied checks are reported as skipped
+    instead of being run. Findings are always reported in schema order, whatever
+    order the checks ran in.
+    """
+
+    def __init__(self, attribute, column_type_name, properties):
+        self.attribute = attribute
+        self.column_type_name = column_type_name
+        self.checks = []
+
+        if column_type_name is not None:
+            self.checks.append(ColumnCheck('type', f'{column_type_name} type', -1, self.run_type_check))
+
+        for position, property in enumerate(properties or []):
+            property_type = property['type']
+            if property_type not in PROPERTY_VALIDATORS:
+                continue
+            clean_name, validator = PROPERTY_VALIDATORS[property_type]
+            self.checks.append(ColumnCheck(
+                property_type, clean_name, position,
+                self.property_check(property_type, validator, property['value'])
+            ))
+
+        # Checks that can imply the outcome of others run first
+        self.order = sorted(self.checks, key=lambda check: check.kind not in IMPLYING_KINDS)
+
+    def run_type_check(self, value, recorder):
+        # NULL values are only subject to the nullable property
+        if value is None:
+            return True
+        type_recorder = FindingRecorder()
+        column_type_validator(self.attribute, value, self.column_type_name, type_recorder)
+        recorder.findings.extend(type_recorder.findings)
+        return not any(message_type == 'error' for _, message_type in type_recorder.findings)
+
+    def property_check(self, property_type, validator, property_value):
+        attribute = self.attribute
+
+        def run(value, recorder):
+            if validator(value, property_value):
+                return True
+            recorder.add_message(property_failure_message(attribute, value, property_type, property_value), 'error')
+            return False
+
+        return run
+
+    def implied_kinds(self, check, value):
+        """Return the kinds of checks whose failure is implied by check failing on value"""
+        if check.kind == 'nullable-prop':
+            return VALUE_PROPERTIES
+        if check.kind == 'type':
+            # float() is the FLOAT conversion, and int() and float() reject the same non-strings
+            if self.column_type_name == 'FLOAT' or (
+                    self.column_type_name in ('INT', 'TINYINT') and not isinstance(value, str)):
+                return RANGE_PROPERTIES
+        return ()
+
+    def evaluate(self, value, recorder):
+        """Run the planned checks on value and report their findings to recorder"""
+        findings = {}
+        implied_by = {}
+
+        for check in self.order:
+            check_recorder = FindingRecorder()
+            findings[check] = check_recorder.findings
+
+            if check.kind in implied_by:
+                check_recorder.add_message(
+                    f"Skipped {check.name} check for {self.attribute} with value {value}: "
+                    f"implied by the failed {implied_by[check.kind].name} check",
+                    'info'
+                )
+                continue
+
+            if not check.run(value, check_recorder):
+                for kind in self.implied_kinds(check, value):
+                    implied_by.setdefault(kind, check)
+
+        for check in sorted(findings, key=lambda check: check.position):
+            recorder.findings.extend(findings[check])
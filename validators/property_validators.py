@@ -28,3 +28,25 @@ def no_greater_than_validator(val, max_value):
     except (ValueError, TypeError):
         return False
 
+
+def unique_validator(count, unique):
+    if isinstance(unique, bool):
+        return count <= 1 or not unique
+    return count <= 1 or unique.lower() not in ['true', '1', 'yes']
+
+
+# Property types mapped to their clean names and validators
+PROPERTY_VALIDATORS = {
+    'regex-prop': ('regex', regex_validator),
+    'nullable-prop': ('nullable', nullable_validator),
+    'no-less-than-prop': ('NoLessThan', no_less_than_validator),
+    'no-greater-than-prop': ('NoGreaterThan', no_greater_than_validator)
+}
+
+
+def property_failure_message(attribute, value, property_type, property_value):
+    clean_name = PROPERTY_VALIDATORS[property_type][0]
+    # Special case for regex to avoid complex pattern in error message
+    if property_type == 'regex-prop':
+        return f"Validation failed for {attribute} with value {value} against property {clean_name}"
+    return f"Validation failed for {attribute} with value {value} against property {clean_name} with condition {str(property_value).lower()}"